@@ -4,20 +4,27 @@ Opinian SaaS Blogging Platform - Main Application
 Flask backend with PostgreSQL database
 """
 
+import atexit
 import os
+import queue
 import sys
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from functools import wraps
 import json
 import bcrypt
 import jwt
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash
+from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash, g, has_app_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import logging
 
 # Load environment variables
@@ -48,22 +55,149 @@ CORS(app)
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Hot statements prepared once per pooled connection and run with EXECUTE
+PREPARED_STATEMENTS = {
+    'deactivate_group': "(integer) AS "
+                        "UPDATE groups SET is_active = FALSE, updated_at = CURRENT_TIMESTAMP "
+                        "WHERE id = $1 RETURNING id",
+    'toggle_group_status': "(integer) AS "
+                           "UPDATE groups SET is_active = NOT is_active, updated_at = CURRENT_TIMESTAMP "
+                           "WHERE id = $1 RETURNING is_active",
+    # Sign-up checks for the web registration form
+    'user_exists': "(text, text) AS "
+                   "SELECT EXISTS (SELECT 1 FROM users WHERE username = $1) "
+                   "OR EXISTS (SELECT 1 FROM users WHERE email = $2)",
+    'role_id_by_name': "(text) AS SELECT id FROM roles WHERE name = $1",
+    # Ban toggle, limited to users the moderator's role/group may touch
+    'toggle_user_ban': "(integer, text, integer) AS "
+                       "UPDATE users SET is_banned = NOT is_banned, updated_at = CURRENT_TIMESTAMP "
+                       "WHERE id = $1 AND ($2 = 'SuperAdmin' OR group_id = $3) RETURNING is_banned",
+    # Comment moderation, limited to comments the moderator's role/group may touch
+    'set_comment_approval': "(integer, boolean, text, integer) AS "
+                            "UPDATE comments c SET is_approved = $2, updated_at = CURRENT_TIMESTAMP "
+                            "FROM blog_posts bp WHERE c.id = $1 AND c.blog_post_id = bp.id "
+                            "AND ($3 = 'SuperAdmin' OR bp.group_id = $4) RETURNING c.id",
+    'soft_delete_comment': "(integer, text, integer) AS "
+                           "UPDATE comments c SET is_deleted = TRUE, updated_at = CURRENT_TIMESTAMP "
+                           "FROM blog_posts bp WHERE c.id = $1 AND c.blog_post_id = bp.id "
+                           "AND ($2 = 'SuperAdmin' OR bp.group_id = $3) RETURNING c.id",
+    # Admin organization settings page: details, stats and available themes
+    'organization_settings': "(integer) AS "
+                             "SELECT g.id, g.name, g.theme_id, g.contact_page_content, g.about_page_content, "
+                             "t.name AS theme_name, "
+                             "u.username AS admin_username, u.email AS admin_email, "
+                             "(SELECT COUNT(*) FROM users WHERE group_id = g.id) AS total_users, "
+                             "(SELECT COUNT(*) FROM blog_posts WHERE group_id = g.id) AS total_posts, "
+                             "(SELECT COUNT(*) FROM pages WHERE group_id = g.id) AS total_pages, "
+                             "(SELECT jsonb_agg(jsonb_build_object("
+                             "'id', th.id, 'name', th.name, "
+                             "'description', th.description, 'theme_type', th.theme_type"
+                             ") ORDER BY th.name) "
+                             "FROM themes th WHERE th.group_id = g.id AND th.is_active = TRUE) AS available_themes "
+                             "FROM groups g "
+                             "LEFT JOIN themes t ON g.theme_id = t.id "
+                             "LEFT JOIN users u ON g.admin_user_id = u.id "
+                             "WHERE g.id = $1",
+}
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """Connection that prepares PREPARED_STATEMENTS when it is opened"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        cursor = self.cursor()
+        try:
+            for name, statement in PREPARED_STATEMENTS.items():
+                cursor.execute(f"PREPARE {name} {statement}")
+            self.commit()
+        except Exception as e:
+            self.rollback()
+            logger.error(f"Error preparing statements: {e}")
+        finally:
+            cursor.close()
+
+# Database connection pool (created on first use so forked workers don't share sockets)
+db_pool = None
+db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """Return the process-wide database connection pool, creating it if needed"""
+    global db_pool
+    if db_pool is None:
+        with db_pool_lock:
+            if db_pool is None:
+                db_pool = ThreadedConnectionPool(
+                    int(os.getenv('DB_POOL_MIN', '5')),
+                    int(os.getenv('DB_POOL_MAX', '20')),
+                    host=os.getenv('DB_HOST', 'localhost'),
+                    user=os.getenv('DB_USER', 'postgres'),
+                    password=os.getenv('DB_PASSWORD', ''),
+                    database=os.getenv('DB_NAME', 'opinian'),
+                    port=os.getenv('DB_PORT', '5432'),
+                    connection_factory=PreparedConnection
+                )
+    return db_pool
+
+@atexit.register
+def close_db_pool():
+    """Close every pooled connection when the process exits"""
+    if db_pool is not None and not db_pool.closed:
+        db_pool.closeall()
+
 # Database connection helper
 def get_db_connection():
-    """Create and return a database connection"""
+    """Check out a database connection from the pool
+
+    Within a request every call returns the same connection, so the pool is
+    only touched once per request and the teardown hook hands it back.
+    Outside a request (background threads) each call checks out its own
+    connection, which must be returned with release_db_connection().
+    """
     try:
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', ''),
-            database=os.getenv('DB_NAME', 'opinian'),
-            port=os.getenv('DB_PORT', '5432')
-        )
+        if has_app_context() and 'db_connection' in g:
+            conn = g.db_connection[1]
+            # Don't hand a later caller a transaction an earlier one left aborted
+            if conn.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                conn.rollback()
+            return conn
+        pool = get_db_pool()
+        conn = pool.getconn()
+        if has_app_context():
+            g.db_connection = (pool, conn)
         return conn
     except Exception as e:
         logger.error(f"Database connection error: {e}")
         return None
 
+def release_db_connection(conn):
+    """Return a connection obtained from get_db_connection() to the pool
+
+    The request-scoped connection is kept until the request ends.
+    """
+    if conn is None:
+        return
+    if has_app_context() and g.get('db_connection', (None, None))[1] is conn:
+        return
+    try:
+        db_pool.putconn(conn)
+    except Exception as e:
+        logger.error(f"Error releasing database connection: {e}")
+
+@app.teardown_appcontext
+def release_request_db_connection(exception=None):
+    """Return the request's connection to the pool
+
+    The pool rolls back anything the handler left uncommitted.
+    """
+    entry = g.pop('db_connection', None)
+    if entry is None:
+        return
+    pool, conn = entry
+    try:
+        pool.putconn(conn)
+    except Exception as e:
+        logger.error(f"Error releasing database connection: {e}")
+
 # Authentication decorators
 def login_required(f):
     """Decorator to require login for routes"""
@@ -77,6 +211,8 @@ def login_required(f):
 
 def role_required(allowed_roles):
     """Decorator to require specific roles"""
+    allowed_roles = frozenset(allowed_roles)
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -94,31 +230,209 @@ def role_required(allowed_roles):
     return decorator
 
 # Utility functions
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD')
+
+def hash_password(password):
+    """Hash a password with the deployment's PASSWORD_HASH_METHOD (Werkzeug's default if unset)
+
+    check_password_hash() reads the method back from the stored hash, so
+    changing the setting only affects newly set passwords.
+    """
+    if PASSWORD_HASH_METHOD:
+        return generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+    return generate_password_hash(password)
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     allowed_extensions = set(os.getenv('ALLOWED_EXTENSIONS', 'png,jpg,jpeg,gif,webp').split(','))
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
-def log_user_activity(user_id, action, resource_type=None, resource_id=None, metadata=None):
-    """Log user activity for audit purposes"""
+# In-process cache for read-heavy admin data and verified API tokens (per worker process)
+CACHE_MAX_ENTRIES = 10000
+_cache = {}
+_cache_lock = threading.Lock()
+
+def cache_get(key):
+    """Return the cached value for key, or None if missing or expired"""
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del _cache[key]
+            return None
+        return value
+
+def cache_set(key, value, timeout):
+    """Cache value under key for timeout seconds
+
+    When the cache is full, expired entries are swept and then the oldest
+    entries are dropped.
+    """
+    with _cache_lock:
+        now = time.monotonic()
+        if len(_cache) >= CACHE_MAX_ENTRIES and key not in _cache:
+            for stale in [k for k, (expires_at, _) in _cache.items() if expires_at <= now]:
+                del _cache[stale]
+            while len(_cache) >= CACHE_MAX_ENTRIES:
+                del _cache[next(iter(_cache))]
+        _cache[key] = (now + timeout, value)
+
+def cache_delete(prefix):
+    """Drop every cached entry whose key starts with prefix"""
+    with _cache_lock:
+        for key in [key for key in _cache if key.startswith(prefix)]:
+            del _cache[key]
+
+# Activity log rows waiting for the background writer
+activity_queue = queue.Queue()
+_activity_worker = None
+_activity_worker_lock = threading.Lock()
+
+def _write_activity_batch(batch):
+    """Write activity rows with one multi-row INSERT and roll them into the daily stats"""
+    conn = get_db_connection()
+    if not conn:
+        return
     try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO user_activity_logs 
-                (user_id, action, resource_type, resource_id, ip_address, user_agent, metadata)
-                VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb)
-            """, (
-                user_id, action, resource_type, resource_id,
-                request.remote_addr, request.headers.get('User-Agent'),
-                json.dumps(metadata) if metadata else None
-            ))
-            conn.commit()
-            cursor.close()
-            conn.close()
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO user_activity_logs
+            (user_id, action, resource_type, resource_id, ip_address, user_agent, metadata)
+            VALUES %s
+        """, batch, template="(%s, %s, %s, %s, %s, %s, %s::jsonb)", page_size=500)
+        # Roll the actions into today's per-group counts for the analytics timeline
+        execute_values(cursor, """
+            INSERT INTO daily_activity_stats (day, group_id, action, n)
+            SELECT CURRENT_DATE, COALESCE(u.group_id, 0), v.action, COUNT(*)
+            FROM (VALUES %s) v(user_id, action)
+            LEFT JOIN users u ON u.id = v.user_id
+            GROUP BY 1, 2, 3
+            ON CONFLICT (day, group_id, action) DO UPDATE SET n = daily_activity_stats.n + EXCLUDED.n
+        """, [(row[0], row[1]) for row in batch], template="(%s::integer, %s)", page_size=len(batch))
+        conn.commit()
+        cursor.close()
+        cache_delete('activity_logs:')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_db_connection(conn)
+
+def _drain_activity_queue():
+    """Write queued activity rows, one batch per wake-up"""
+    while True:
+        batch = [activity_queue.get()]
+        while True:
+            try:
+                batch.append(activity_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            _write_activity_batch(batch)
+        except Exception as e:
+            logger.error(f"Error logging user activity: {e}")
+
+        for _ in batch:
+            activity_queue.task_done()
+
+@atexit.register
+def flush_activity_queue():
+    """Write activity rows still queued when the worker exits"""
+    batch = []
+    while True:
+        try:
+            batch.append(activity_queue.get_nowait())
+        except queue.Empty:
+            break
+    if not batch:
+        return
+    try:
+        _write_activity_batch(batch)
     except Exception as e:
         logger.error(f"Error logging user activity: {e}")
+    for _ in batch:
+        activity_queue.task_done()
+
+def log_user_activity(user_id, action, resource_type=None, resource_id=None, metadata=None):
+    """Log user activity for audit purposes
+
+    The row is queued for a background writer so the request doesn't wait
+    on the INSERT.
+    """
+    global _activity_worker
+    if _activity_worker is None:
+        with _activity_worker_lock:
+            if _activity_worker is None:
+                _activity_worker = threading.Thread(target=_drain_activity_queue, daemon=True)
+                _activity_worker.start()
+    activity_queue.put((
+        user_id, action, resource_type, resource_id,
+        request.remote_addr, request.headers.get('User-Agent'),
+        json.dumps(metadata) if metadata else None
+    ))
+
+# View counts buffered per (table, id) and applied in batches off the read path
+VIEW_COUNT_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNT_FLUSH_INTERVAL', '10'))
+VIEW_COUNT_TABLES = ('blog_posts', 'pages')
+_pending_views = Counter()
+_pending_views_lock = threading.Lock()
+_view_count_worker = None
+
+@atexit.register
+def flush_view_counts():
+    """Add the buffered view counts to blog_posts/pages, one UPDATE per table"""
+    with _pending_views_lock:
+        pending = dict(_pending_views)
+        _pending_views.clear()
+    if not pending:
+        return
+    conn = get_db_connection()
+    if not conn:
+        _requeue_view_counts(pending)
+        return
+    try:
+        cursor = conn.cursor()
+        for table in VIEW_COUNT_TABLES:
+            rows = [(row_id, n) for (row_table, row_id), n in pending.items() if row_table == table]
+            if rows:
+                execute_values(cursor, f"""
+                    UPDATE {table} SET view_count = {table}.view_count + v.n
+                    FROM (VALUES %s) v(id, n)
+                    WHERE {table}.id = v.id
+                """, rows, template="(%s::integer, %s::integer)", page_size=len(rows))
+        conn.commit()
+        cursor.close()
+    except Exception as e:
+        conn.rollback()
+        _requeue_view_counts(pending)
+        logger.error(f"Error updating view counts: {e}")
+    finally:
+        release_db_connection(conn)
+
+def _requeue_view_counts(pending):
+    """Put counts from a failed flush back so the next flush retries them"""
+    with _pending_views_lock:
+        _pending_views.update(pending)
+
+def _flush_view_counts_periodically():
+    """Background loop applying buffered view counts every few seconds"""
+    while True:
+        time.sleep(VIEW_COUNT_FLUSH_INTERVAL)
+        flush_view_counts()
+
+def record_view(table, row_id):
+    """Count a view of a blog post or page without writing on the request path"""
+    global _view_count_worker
+    if _view_count_worker is None:
+        with _pending_views_lock:
+            if _view_count_worker is None:
+                _view_count_worker = threading.Thread(target=_flush_view_counts_periodically, daemon=True)
+                _view_count_worker.start()
+    with _pending_views_lock:
+        _pending_views[(table, row_id)] += 1
 
 def get_active_theme(group_id):
     """Get the active theme for a group"""
@@ -135,7 +449,7 @@ def get_active_theme(group_id):
             """, (group_id,))
             theme = cursor.fetchone()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             return theme
     except Exception as e:
         logger.error(f"Error loading theme: {e}")
@@ -165,7 +479,7 @@ def index():
             blog_posts = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('index.html', blog_posts=blog_posts)
         else:
@@ -196,7 +510,7 @@ def login():
                 
                 user = cursor.fetchone()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 
                 if user and check_password_hash(user['password_hash'], password):
                     if user['is_banned']:
@@ -214,11 +528,11 @@ def login():
                     if conn:
                         cursor = conn.cursor()
                         cursor.execute("""
-                            UPDATE users SET last_login = %s WHERE id = %s
-                        """, (datetime.utcnow(), user['id']))
+                            UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = %s
+                        """, (user['id'],))
                         conn.commit()
                         cursor.close()
-                        conn.close()
+                        release_db_connection(conn)
                     
                     # Log login activity
                     log_user_activity(user['id'], 'login')
@@ -250,19 +564,18 @@ def register():
                 cursor = conn.cursor()
                 
                 # Check if user already exists
-                cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s", 
-                             (username, email))
-                if cursor.fetchone():
+                cursor.execute("EXECUTE user_exists(%s, %s)", (username, email))
+                if cursor.fetchone()[0]:
                     flash('Username or email already exists.', 'danger')
                     return render_template('register.html')
                 
                 # Get default user role
-                cursor.execute("SELECT id FROM roles WHERE name = 'User'")
+                cursor.execute("EXECUTE role_id_by_name(%s)", ('User',))
                 role_result = cursor.fetchone()
                 default_role_id = role_result[0] if role_result else None
                 
                 # Create user
-                password_hash = generate_password_hash(password)
+                password_hash = hash_password(password)
                 cursor.execute("""
                     INSERT INTO users (username, email, password_hash, first_name, last_name, role_id)
                     VALUES (%s, %s, %s, %s, %s, %s)
@@ -272,7 +585,7 @@ def register():
                 user_id = cursor.fetchone()[0]
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
 
                 # Log registration activity
                 log_user_activity(user_id, 'register')
@@ -387,21 +700,21 @@ def edit_profile():
                         return render_template('edit_profile.html', user=user)
 
                     # Update with new password
-                    password_hash = generate_password_hash(new_password)
+                    password_hash = hash_password(new_password)
                     cursor.execute("""
                         UPDATE users
                         SET first_name = %s, last_name = %s, bio = %s,
-                            profile_image_url = %s, password_hash = %s, updated_at = %s
+                            profile_image_url = %s, password_hash = %s, updated_at = CURRENT_TIMESTAMP
                         WHERE id = %s
-                    """, (first_name, last_name, bio, profile_image_url, password_hash, datetime.utcnow(), user_id))
+                    """, (first_name, last_name, bio, profile_image_url, password_hash, user_id))
                 else:
                     # Update without password change
                     cursor.execute("""
                         UPDATE users
                         SET first_name = %s, last_name = %s, bio = %s,
-                            profile_image_url = %s, updated_at = %s
+                            profile_image_url = %s, updated_at = CURRENT_TIMESTAMP
                         WHERE id = %s
-                    """, (first_name, last_name, bio, profile_image_url, datetime.utcnow(), user_id))
+                    """, (first_name, last_name, bio, profile_image_url, user_id))
 
                 conn.commit()
 
@@ -413,7 +726,7 @@ def edit_profile():
                 log_user_activity(user_id, 'update_profile', 'user', user_id)
 
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
 
                 flash('Profile updated successfully!', 'success')
                 return redirect(url_for('edit_profile'))
@@ -436,7 +749,7 @@ def edit_profile():
             """, (user_id,))
             user = cursor.fetchone()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             return render_template('edit_profile.html', user=user)
         else:
@@ -493,7 +806,7 @@ def forgot_password():
                     log_user_activity(user['id'], 'request_password_reset')
 
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
 
                 # Always show success message (security best practice)
                 flash('If an account with that email exists, a password reset link has been sent.', 'success')
@@ -529,7 +842,7 @@ def reset_password(token):
 
         if not token_data:
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             flash('Invalid or expired password reset link.', 'danger')
             return redirect(url_for('login'))
 
@@ -550,7 +863,7 @@ def reset_password(token):
                 return render_template('reset_password.html', token=token)
 
             # Update password
-            password_hash = generate_password_hash(new_password)
+            password_hash = hash_password(new_password)
             cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s",
                           (password_hash, token_data['user_id']))
 
@@ -562,13 +875,13 @@ def reset_password(token):
             log_user_activity(token_data['user_id'], 'reset_password')
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Your password has been reset successfully. Please log in.', 'success')
             return redirect(url_for('login'))
 
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
         return render_template('reset_password.html', token=token)
 
     except Exception as e:
@@ -592,13 +905,14 @@ def dashboard():
             
             # Get user statistics based on role
             if user_role == 'SuperAdmin':
-                # SuperAdmin sees platform-wide stats
+                # SuperAdmin sees platform-wide stats, as planner estimates
+                # rather than full-table counts
                 cursor.execute("""
-                    SELECT 
-                        (SELECT COUNT(*) FROM users WHERE is_active = TRUE) as total_users,
-                        (SELECT COUNT(*) FROM groups WHERE is_active = TRUE) as total_groups,
-                        (SELECT COUNT(*) FROM blog_posts WHERE is_published = TRUE) as total_blog_posts,
-                        (SELECT COUNT(*) FROM pages WHERE is_published = TRUE) as total_pages
+                    SELECT
+                        count_estimate('SELECT 1 FROM users WHERE is_active = TRUE') as total_users,
+                        count_estimate('SELECT 1 FROM groups WHERE is_active = TRUE') as total_groups,
+                        count_estimate('SELECT 1 FROM blog_posts WHERE is_published = TRUE') as total_blog_posts,
+                        count_estimate('SELECT 1 FROM pages WHERE is_published = TRUE') as total_pages
                 """)
             elif user_role == 'Admin':
                 # Admin sees group-wide stats
@@ -629,7 +943,7 @@ def dashboard():
             recent_activity = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('dashboard.html', 
                                  stats=stats, 
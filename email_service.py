@@ -3,11 +3,13 @@ Email service for Opinian platform
 Handles email sending for password reset, welcome emails, and notifications
 """
 
+import atexit
 import os
 import logging
 from flask import render_template_string
 from flask_mail import Mail, Message
-from threading import Thread
+import queue
+from threading import Thread, Lock
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +24,72 @@ def init_mail(app):
     logger.info("Email service initialized")
 
 
-def send_async_email(app, msg):
-    """Send email asynchronously"""
+# Outgoing messages waiting for the background sender
+email_queue = queue.Queue()
+_email_worker = None
+_email_worker_lock = Lock()
+
+
+def _send_email_batch(app, batch):
+    """Send a batch of queued emails over one SMTP connection"""
     with app.app_context():
         try:
-            mail.send(msg)
-            logger.info(f"Email sent successfully to {msg.recipients}")
+            with mail.connect() as connection:
+                # One bad message mustn't drop the rest of the batch
+                for queued_msg in batch:
+                    try:
+                        connection.send(queued_msg)
+                        logger.info(f"Email sent successfully to {queued_msg.recipients}")
+                    except Exception as e:
+                        logger.error(f"Failed to send email to {queued_msg.recipients}: {e}")
         except Exception as e:
-            logger.error(f"Failed to send email: {e}")
+            logger.error(f"Failed to send {len(batch)} email(s): {e}")
+
+
+def _drain_email_queue():
+    """Send queued emails, reusing one SMTP connection for each batch"""
+    while True:
+        app, msg = email_queue.get()
+        batch = [msg]
+        while True:
+            try:
+                batch.append(email_queue.get_nowait()[1])
+            except queue.Empty:
+                break
+
+        _send_email_batch(app, batch)
+
+        for _ in batch:
+            email_queue.task_done()
+
+
+@atexit.register
+def flush_email_queue():
+    """Send emails still queued when the worker exits"""
+    batch = []
+    app = None
+    while True:
+        try:
+            app, msg = email_queue.get_nowait()
+        except queue.Empty:
+            break
+        batch.append(msg)
+    if not batch:
+        return
+    _send_email_batch(app, batch)
+    for _ in batch:
+        email_queue.task_done()
+
+
+def enqueue_email(app, msg):
+    """Queue an email for the background sender, starting it on first use"""
+    global _email_worker
+    if _email_worker is None:
+        with _email_worker_lock:
+            if _email_worker is None:
+                _email_worker = Thread(target=_drain_email_queue, daemon=True)
+                _email_worker.start()
+    email_queue.put((app, msg))
 
 
 def send_email(subject, recipients, text_body, html_body, sender=None, app=None):
@@ -58,8 +118,8 @@ def send_email(subject, recipients, text_body, html_body, sender=None, app=None)
         msg.html = html_body
 
         if app:
-            # Send asynchronously
-            Thread(target=send_async_email, args=(app, msg)).start()
+            # Send asynchronously from the background queue
+            enqueue_email(app, msg)
         else:
             # Send synchronously
             mail.send(msg)
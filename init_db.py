@@ -259,6 +259,7 @@ def create_tables():
                 meta_description TEXT,
                 meta_keywords TEXT,
                 view_count INTEGER DEFAULT 0,
+                comment_count INTEGER NOT NULL DEFAULT 0,
                 published_at TIMESTAMP,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -317,6 +318,17 @@ def create_tables():
             )
         """)
         
+        # Create daily_activity_stats table (per-day action counts; group_id 0 = no group)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS daily_activity_stats (
+                day DATE NOT NULL,
+                group_id INTEGER NOT NULL DEFAULT 0,
+                action VARCHAR(100) NOT NULL,
+                n INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, group_id, action)
+            )
+        """)
+        
         # Create moderation_queue table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS moderation_queue (
@@ -500,6 +512,17 @@ def update_schema():
             cursor.execute("ALTER TABLE pages ADD COLUMN view_count INTEGER DEFAULT 0")
             print("  - Added column: pages.view_count")
 
+        if not column_exists('blog_posts', 'comment_count'):
+            cursor.execute("ALTER TABLE blog_posts ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0")
+            cursor.execute("""
+                UPDATE blog_posts bp
+                SET comment_count = (
+                    SELECT COUNT(*) FROM comments c
+                    WHERE c.blog_post_id = bp.id AND c.is_deleted = FALSE
+                )
+            """)
+            print("  - Added column: blog_posts.comment_count")
+
         # Add missing columns to users table
         if not column_exists('users', 'profile_image_url'):
             cursor.execute("ALTER TABLE users ADD COLUMN profile_image_url VARCHAR(255)")
@@ -522,6 +545,58 @@ def update_schema():
             cursor.execute("ALTER TABLE media_files ADD COLUMN mime_type VARCHAR(100)")
             print("  - Added column: media_files.mime_type")
 
+        # Backfill daily activity rollups from the existing activity log
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM daily_activity_stats)")
+        if not cursor.fetchone()[0]:
+            cursor.execute("""
+                INSERT INTO daily_activity_stats (day, group_id, action, n)
+                SELECT DATE(ual.created_at), COALESCE(u.group_id, 0), ual.action, COUNT(*)
+                FROM user_activity_logs ual
+                LEFT JOIN users u ON ual.user_id = u.id
+                GROUP BY 1, 2, 3
+            """)
+            if cursor.rowcount:
+                print("  - Backfilled daily_activity_stats")
+
+        # Keep blog_posts.comment_count in step with non-deleted comments
+        cursor.execute("""
+            CREATE OR REPLACE FUNCTION bump_comment_count() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_deleted = FALSE THEN
+                    UPDATE blog_posts SET comment_count = comment_count - 1 WHERE id = OLD.blog_post_id;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_deleted = FALSE THEN
+                    UPDATE blog_posts SET comment_count = comment_count + 1 WHERE id = NEW.blog_post_id;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cursor.execute("DROP TRIGGER IF EXISTS comments_count_insert_delete ON comments")
+        cursor.execute("""
+            CREATE TRIGGER comments_count_insert_delete
+            AFTER INSERT OR DELETE ON comments
+            FOR EACH ROW EXECUTE FUNCTION bump_comment_count()
+        """)
+        cursor.execute("DROP TRIGGER IF EXISTS comments_count_update ON comments")
+        cursor.execute("""
+            CREATE TRIGGER comments_count_update
+            AFTER UPDATE OF is_deleted, blog_post_id ON comments
+            FOR EACH ROW EXECUTE FUNCTION bump_comment_count()
+        """)
+
+        # Planner row estimate for a query, for overview totals that needn't be exact
+        cursor.execute("""
+            CREATE OR REPLACE FUNCTION count_estimate(query text) RETURNS bigint AS $$
+            DECLARE
+                plan jsonb;
+            BEGIN
+                EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO plan;
+                RETURN (plan->0->'Plan'->>'Plan Rows')::bigint;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+
         # Helper function to check if constraint exists
         def constraint_exists(constraint_name):
             cursor.execute("""
@@ -725,6 +800,9 @@ def create_indexes():
             port=os.getenv('DB_PORT', '5432')
         )
         cursor = conn.cursor()
+
+        # Trigram operator classes let the ILIKE '%term%' searches use GIN indexes
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
         
         # Create performance indexes
         indexes = [
@@ -742,13 +820,46 @@ def create_indexes():
             "CREATE INDEX IF NOT EXISTS idx_themes_created_by ON themes(created_by)",
             "CREATE INDEX IF NOT EXISTS idx_comments_blog_post_id ON comments(blog_post_id)",
             "CREATE INDEX IF NOT EXISTS idx_comments_user_id ON comments(user_id)",
-            "CREATE INDEX IF NOT EXISTS idx_comments_parent_id ON comments(parent_id)"
+            "CREATE INDEX IF NOT EXISTS idx_comments_parent_id ON comments(parent_id)",
+            "CREATE INDEX IF NOT EXISTS idx_users_group_active ON users(group_id) INCLUDE (is_active)",
+            "CREATE INDEX IF NOT EXISTS idx_moderation_queue_status_type_created ON moderation_queue(status, content_type, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_moderation_queue_status_created ON moderation_queue(status, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_user_activity_logs_user_created ON user_activity_logs(user_id, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_user_activity_logs_created_id ON user_activity_logs(created_at DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_users_group_created ON users(group_id, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_users_created_id ON users(created_at DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_group_created ON blog_posts(group_id, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_comments_active_blog_post_id ON comments(blog_post_id) WHERE is_deleted = FALSE",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_group_published_views ON blog_posts(group_id, view_count DESC) INCLUDE (id, title, slug) WHERE is_published = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_pages_group_published_views ON pages(group_id, view_count DESC) INCLUDE (id, title, slug) WHERE is_published = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_group_published_comments ON blog_posts(group_id, comment_count DESC) WHERE is_published = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_published_id ON blog_posts(published_at DESC, id DESC) WHERE is_published = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_published_comments ON blog_posts(comment_count DESC) WHERE is_published = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_comments_active_created ON comments(created_at DESC, id DESC) WHERE is_deleted = FALSE",
+            "CREATE INDEX IF NOT EXISTS idx_moderation_queue_pending ON moderation_queue(content_type, content_id) WHERE status = 'pending'",
+            "CREATE INDEX IF NOT EXISTS idx_users_banned ON users(group_id) WHERE is_banned = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_author_published ON blog_posts(author_id) WHERE is_published = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_pages_author_published ON pages(author_id) WHERE is_published = TRUE",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_title_trgm ON blog_posts USING gin (title gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_content_trgm ON blog_posts USING gin (content gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_excerpt_trgm ON blog_posts USING gin (excerpt gin_trgm_ops)",
+            # Full-text search in the blog posts API (expression matches routes/api.py)
+            "CREATE INDEX IF NOT EXISTS idx_blog_posts_search ON blog_posts USING gin "
+            "(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, '')))"
         ]
         
         for index in indexes:
             cursor.execute(index)
         
+        # Refresh planner statistics so the new indexes are picked up
+        cursor.execute("ANALYZE")
+        
         conn.commit()
+
+        # Set the visibility map so the partial-index counts are index-only
+        # scans (VACUUM cannot run inside a transaction)
+        conn.autocommit = True
+        cursor.execute("VACUUM moderation_queue, users, blog_posts, pages")
         print("Database indexes created successfully")
         
         cursor.close()
@@ -758,6 +869,199 @@ def create_indexes():
         print(f"Error creating indexes: {e}")
         sys.exit(1)
 
+# Materialized views backing the analytics dashboard: (name, definition, unique index).
+# REFRESH MATERIALIZED VIEW CONCURRENTLY needs a unique index on plain columns,
+# so the single-row views carry a constant id column for it.
+ANALYTICS_VIEWS = [
+    ('analytics_overview', """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_overview AS
+        SELECT
+            1 as id,
+            (SELECT COUNT(*) FROM users WHERE is_active = TRUE) as total_users,
+            (SELECT COUNT(*) FROM groups WHERE is_active = TRUE) as total_groups,
+            bp.total_blog_posts, p.total_pages,
+            (SELECT COUNT(*) FROM comments WHERE is_deleted = FALSE) as total_comments,
+            bp.total_blog_views, p.total_page_views
+        FROM (
+            SELECT COUNT(*) FILTER (WHERE is_published = TRUE) as total_blog_posts,
+                   COALESCE(SUM(view_count), 0) as total_blog_views
+            FROM blog_posts
+        ) bp, (
+            SELECT COUNT(*) FILTER (WHERE is_published = TRUE) as total_pages,
+                   COALESCE(SUM(view_count), 0) as total_page_views
+            FROM pages
+        ) p
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_overview_id ON analytics_overview(id)"),
+    ('mv_group_overview_stats', """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_group_overview_stats AS
+        WITH us AS (
+            SELECT group_id, COUNT(*) as total_users
+            FROM users
+            WHERE is_active = TRUE
+            GROUP BY group_id
+        ), bp AS (
+            SELECT group_id,
+                   COUNT(*) FILTER (WHERE is_published = TRUE) as total_blog_posts,
+                   COALESCE(SUM(view_count), 0) as total_blog_views
+            FROM blog_posts
+            GROUP BY group_id
+        ), pg AS (
+            SELECT group_id,
+                   COUNT(*) FILTER (WHERE is_published = TRUE) as total_pages,
+                   COALESCE(SUM(view_count), 0) as total_page_views
+            FROM pages
+            GROUP BY group_id
+        ), cm AS (
+            SELECT bp.group_id, COUNT(*) as total_comments
+            FROM comments c
+            JOIN blog_posts bp ON c.blog_post_id = bp.id
+            WHERE c.is_deleted = FALSE
+            GROUP BY bp.group_id
+        )
+        SELECT g.id as group_id,
+               COALESCE(us.total_users, 0) as total_users,
+               COALESCE(bp.total_blog_posts, 0) as total_blog_posts,
+               COALESCE(pg.total_pages, 0) as total_pages,
+               COALESCE(cm.total_comments, 0) as total_comments,
+               COALESCE(bp.total_blog_views, 0) as total_blog_views,
+               COALESCE(pg.total_page_views, 0) as total_page_views
+        FROM groups g
+        LEFT JOIN us ON us.group_id = g.id
+        LEFT JOIN bp ON bp.group_id = g.id
+        LEFT JOIN pg ON pg.group_id = g.id
+        LEFT JOIN cm ON cm.group_id = g.id
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_group_overview_stats_group ON mv_group_overview_stats(group_id)"),
+    ('mv_popular_posts_by_group', """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_popular_posts_by_group AS
+        SELECT * FROM (
+            SELECT bp.id, bp.group_id, bp.title, bp.slug, bp.view_count, bp.created_at,
+                   u.username as author_username, u.first_name, u.last_name,
+                   g.name as group_name,
+                   bp.comment_count,
+                   row_number() OVER (PARTITION BY bp.group_id ORDER BY bp.view_count DESC) as group_rank
+            FROM blog_posts bp
+            JOIN users u ON bp.author_id = u.id
+            LEFT JOIN groups g ON bp.group_id = g.id
+            WHERE bp.is_published = TRUE
+        ) ranked
+        WHERE group_rank <= 50
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_popular_posts_by_group_id ON mv_popular_posts_by_group(id)"),
+    ('mv_tag_stats', """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_tag_stats AS
+        SELECT COALESCE(group_id, 0) as group_id, tag,
+               COUNT(*) as post_count,
+               COALESCE(SUM(view_count), 0) as total_views,
+               AVG(view_count) as avg_views
+        FROM blog_posts, unnest(tags) as tag
+        WHERE is_published = TRUE AND tags IS NOT NULL AND array_length(tags, 1) > 0
+        GROUP BY COALESCE(group_id, 0), tag
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_tag_stats_group_tag ON mv_tag_stats(group_id, tag)"),
+    ('mv_admin_dashboard_stats', """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_admin_dashboard_stats AS
+        SELECT 1 as id, us.total_users, gr.total_groups, bp.total_blog_posts, pg.total_pages, us.banned_users
+        FROM (
+            SELECT COUNT(*) FILTER (WHERE is_active = TRUE) as total_users,
+                   COUNT(*) FILTER (WHERE is_banned = TRUE) as banned_users
+            FROM users
+        ) us, (
+            SELECT COUNT(*) as total_groups FROM groups WHERE is_active = TRUE
+        ) gr, (
+            SELECT COUNT(*) as total_blog_posts FROM blog_posts WHERE is_published = TRUE
+        ) bp, (
+            SELECT COUNT(*) as total_pages FROM pages WHERE is_published = TRUE
+        ) pg
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_admin_dashboard_stats_id ON mv_admin_dashboard_stats(id)"),
+    ('mv_admin_dashboard_stats_by_group', """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_admin_dashboard_stats_by_group AS
+        WITH us AS (
+            SELECT group_id,
+                   COUNT(*) FILTER (WHERE is_active = TRUE) as total_users,
+                   COUNT(*) FILTER (WHERE is_banned = TRUE) as banned_users
+            FROM users
+            GROUP BY group_id
+        ), bp AS (
+            SELECT group_id, COUNT(*) as total_blog_posts
+            FROM blog_posts
+            WHERE is_published = TRUE
+            GROUP BY group_id
+        ), pg AS (
+            SELECT group_id, COUNT(*) as total_pages
+            FROM pages
+            WHERE is_published = TRUE
+            GROUP BY group_id
+        )
+        SELECT g.id as group_id,
+               COALESCE(us.total_users, 0) as total_users,
+               COALESCE(bp.total_blog_posts, 0) as total_blog_posts,
+               COALESCE(pg.total_pages, 0) as total_pages,
+               COALESCE(us.banned_users, 0) as banned_users
+        FROM groups g
+        LEFT JOIN us ON us.group_id = g.id
+        LEFT JOIN bp ON bp.group_id = g.id
+        LEFT JOIN pg ON pg.group_id = g.id
+    """, "CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_admin_dashboard_stats_by_group_group ON mv_admin_dashboard_stats_by_group(group_id)"),
+]
+
+def create_views():
+    """Create materialized views backing the analytics dashboard"""
+    try:
+        conn = psycopg2.connect(
+            host=os.getenv('DB_HOST', 'localhost'),
+            user=os.getenv('DB_USER', 'postgres'),
+            password=os.getenv('DB_PASSWORD', ''),
+            database=os.getenv('DB_NAME', 'opinian'),
+            port=os.getenv('DB_PORT', '5432')
+        )
+        cursor = conn.cursor()
+
+        for name, definition, unique_index in ANALYTICS_VIEWS:
+            cursor.execute(definition)
+            cursor.execute(unique_index)
+
+        conn.commit()
+        print("Database views created successfully")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Error creating views: {e}")
+        sys.exit(1)
+
+def refresh_analytics_views():
+    """Refresh the analytics views (run periodically, e.g. from cron)"""
+    try:
+        conn = psycopg2.connect(
+            host=os.getenv('DB_HOST', 'localhost'),
+            user=os.getenv('DB_USER', 'postgres'),
+            password=os.getenv('DB_PASSWORD', ''),
+            database=os.getenv('DB_NAME', 'opinian'),
+            port=os.getenv('DB_PORT', '5432')
+        )
+        cursor = conn.cursor()
+
+        # Each view refreshes in its own transaction so one failure doesn't
+        # leave the others stale
+        failed = []
+        for name, definition, unique_index in ANALYTICS_VIEWS:
+            try:
+                cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}")
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Error refreshing {name}: {e}")
+                failed.append(name)
+
+        cursor.close()
+        conn.close()
+
+        if failed:
+            sys.exit(1)
+
+    except Exception as e:
+        print(f"Error refreshing analytics views: {e}")
+        sys.exit(1)
+
 def validate_email(email):
     """Basic email validation"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -897,6 +1201,10 @@ def create_superadmin():
         print("You can create a SuperAdmin later using: python create_superadmin.py")
 
 if __name__ == "__main__":
+    if '--refresh-analytics' in sys.argv:
+        refresh_analytics_views()
+        sys.exit(0)
+
     print("="*60)
     print("Opinian Platform - Database Initialization")
     print("="*60)
@@ -906,6 +1214,7 @@ if __name__ == "__main__":
     update_schema()  # Add missing columns to existing tables
     insert_initial_data()
     create_indexes()
+    create_views()
 
     print("\n" + "="*60)
     print("[SUCCESS] Database initialization completed successfully!")
@@ -3,18 +3,179 @@ Admin routes for Opinian platform
 Handles user management, permissions, and system administration
 """
 
+import csv
+import hashlib
+import io
 import logging
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from werkzeug.security import generate_password_hash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, stream_template, stream_with_context, make_response, Response
 from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from app import get_db_connection, login_required, role_required, log_user_activity
+from psycopg2.extras import NamedTupleCursor, RealDictCursor
+from psycopg2.pool import PoolError
+from email_service import send_moderation_decision_email
+from app import get_db_connection, release_db_connection, login_required, role_required, log_user_activity, cache_get, cache_set, cache_delete, hash_password
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# Cache lifetimes (seconds) for read-heavy admin pages. The cache is per worker
+# process and cache_delete() only clears the current one, so after a write the
+# other workers can serve the old data for up to these lifetimes.
+ACTIVITY_LOGS_CACHE_TIMEOUT = 60
+ANALYTICS_CACHE_TIMEOUT = 180
+REFERENCE_CACHE_TIMEOUT = 30
+LIST_CACHE_TIMEOUT = 30
+API_SETTINGS_CACHE_TIMEOUT = 60
+
+# Rows per page on the comment moderation list
+COMMENTS_PER_PAGE = 100
+USERS_PER_PAGE = 100
+ACTIVITY_LOGS_PER_PAGE = 100
+COMMENTS_EXPORT_BATCH_SIZE = 1000
+# The dashboard counts pending moderation up to this many and shows "N+" beyond
+PENDING_MODERATION_COUNT_CAP = 1000
+
+# Worker threads for running the independent analytics queries side by side
+analytics_executor = ThreadPoolExecutor(max_workers=4)
+
+# Tables and materialized views whose row inserts/deletes change the analytics
+# sections. Updates are left out: logins, view-count flushes and the activity
+# rollup touch these tables constantly, and the sections they move are fine to
+# trail by the TTL.
+ANALYTICS_SOURCE_TABLES = ['users', 'blog_posts', 'pages', 'comments',
+                           'analytics_overview', 'mv_group_overview_stats',
+                           'mv_popular_posts_by_group', 'mv_tag_stats']
+
+
+def _missing_group_scope():
+    """True for a non-SuperAdmin session with no group, whose group-scoped queries match nothing"""
+    return session.get('user_role') != 'SuperAdmin' and not session.get('group_id')
+
+
+def _fetch_all(query, params=None):
+    """Run a read-only query on its own pooled connection and return all rows"""
+    conn = get_db_connection()
+    if not conn:
+        raise PoolError('No database connection available')
+    try:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        release_db_connection(conn)
+
+
+def _cached_reference(key, query, conn=None):
+    """Rows of a small reference query, cached under key
+
+    On a miss the query runs on conn, or on a pooled connection of its own
+    when the caller holds none.
+    """
+    rows = cache_get(key)
+    if rows is None:
+        if conn is None:
+            rows = _fetch_all(query)
+        else:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            cursor.close()
+        cache_set(key, rows, REFERENCE_CACHE_TIMEOUT)
+    return rows
+
+
+def _get_roles(conn=None):
+    """All roles; they only change with the schema"""
+    return _cached_reference('admin:roles', "SELECT id, name, description FROM roles ORDER BY id", conn)
+
+
+def _get_active_groups(conn=None):
+    """Active groups for the user forms, cached until a group is written"""
+    return _cached_reference('admin:groups', """
+        SELECT id, name FROM groups
+        WHERE is_active = TRUE
+        ORDER BY name
+    """, conn)
+
+
+def _get_themes(conn=None):
+    """All themes for the group forms, cached until a theme is written"""
+    return _cached_reference('admin:themes', """
+        SELECT id, name, description, theme_type, is_active
+        FROM themes
+        ORDER BY name
+    """, conn)
+
+
+def _analytics_source_versions():
+    """Insert/delete counters of the analytics source tables, which change when rows come or go"""
+    rows = _fetch_all("""
+        SELECT relname, n_tup_ins + n_tup_del as version
+        FROM pg_stat_user_tables
+        WHERE relname = ANY(%s)
+    """, (ANALYTICS_SOURCE_TABLES,))
+    return {row['relname']: row['version'] for row in rows}
+
+
+def _render_conditional(template, **context):
+    """Render template with an ETag over its data, or return 304 if the client's copy is current"""
+    etag = hashlib.sha1(repr((session.get('user_id'), sorted(context.items()))).encode()).hexdigest()
+    # Pending flash messages are part of the page, so never answer 304 over them
+    if '_flashes' not in session and request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render_template(template, **context))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class _SectionRows:
+    """Rows of one dashboard query started on analytics_executor
+
+    result() waits for the query. If it could not get a pooled connection of
+    its own (pool exhausted) it is run on the calling thread's connection.
+    """
+
+    def __init__(self, query, params=None, single=False):
+        self.query = query
+        self.params = params
+        self.single = single
+        self.future = analytics_executor.submit(_fetch_all, query, params)
+        self.rows = None
+
+    def result(self):
+        if self.rows is None:
+            try:
+                rows = self.future.result()
+            except PoolError:
+                conn = get_db_connection()
+                if not conn:
+                    raise RuntimeError('Database connection error')
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor.execute(self.query, self.params)
+                rows = cursor.fetchall()
+                cursor.close()
+                release_db_connection(conn)
+            if self.single:
+                rows = rows[0] if rows else {}
+            self.rows = rows
+        return self.rows
+
+
+def _parse_after(value):
+    """Parse an ISO timestamp keyset cursor from the query string, or None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
 @bp.route('/dashboard')
 @login_required
 @role_required(['SuperAdmin', 'Admin'])
@@ -23,52 +184,77 @@ def dashboard():
     try:
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor(cursor_factory=NamedTupleCursor)
             
             user_role = session['user_role']
             group_id = session.get('group_id')
             
+            # Totals come from materialized views refreshed by
+            # `init_db.py --refresh-analytics`; the moderation backlog is
+            # counted live since approvals should clear it immediately, but
+            # only up to one past the cap so a large backlog stays cheap
             if user_role == 'SuperAdmin':
                 # SuperAdmin sees platform-wide data
                 cursor.execute("""
-                    SELECT 
-                        (SELECT COUNT(*) FROM users WHERE is_active = TRUE) as total_users,
-                        (SELECT COUNT(*) FROM groups WHERE is_active = TRUE) as total_groups,
-                        (SELECT COUNT(*) FROM blog_posts WHERE is_published = TRUE) as total_blog_posts,
-                        (SELECT COUNT(*) FROM pages WHERE is_published = TRUE) as total_pages,
-                        (SELECT COUNT(*) FROM users WHERE is_banned = TRUE) as banned_users,
-                        (SELECT COUNT(*) FROM moderation_queue WHERE status = 'pending') as pending_moderation
-                """)
+                    SELECT s.total_users, s.total_groups, s.total_blog_posts, s.total_pages,
+                           s.banned_users,
+                           (SELECT COUNT(*) FROM (
+                               SELECT 1 FROM moderation_queue WHERE status = 'pending' LIMIT %s
+                           ) pending) as pending_moderation
+                    FROM mv_admin_dashboard_stats s
+                """, (PENDING_MODERATION_COUNT_CAP + 1,))
             else:
-                # Admin sees group-specific data
+                # Admin sees group-specific data; a group created since the
+                # last refresh has no row yet and shows zeros
                 cursor.execute("""
-                    SELECT
-                        (SELECT COUNT(*) FROM users WHERE group_id = %s AND is_active = TRUE) as total_users,
-                        (SELECT COUNT(*) FROM blog_posts WHERE group_id = %s AND is_published = TRUE) as total_blog_posts,
-                        (SELECT COUNT(*) FROM pages WHERE group_id = %s AND is_published = TRUE) as total_pages,
-                        (SELECT COUNT(*) FROM users WHERE group_id = %s AND is_banned = TRUE) as banned_users,
-                        (SELECT COUNT(*) FROM moderation_queue mq
-                         LEFT JOIN blog_posts bp ON mq.content_type = 'blog_post' AND mq.content_id = bp.id
-                         LEFT JOIN pages p ON mq.content_type = 'page' AND mq.content_id = p.id
-                         WHERE mq.status = 'pending' AND (bp.group_id = %s OR p.group_id = %s)) as pending_moderation
-                """, (group_id, group_id, group_id, group_id, group_id, group_id))
+                    SELECT COALESCE(s.total_users, 0) as total_users,
+                           COALESCE(s.total_blog_posts, 0) as total_blog_posts,
+                           COALESCE(s.total_pages, 0) as total_pages,
+                           COALESCE(s.banned_users, 0) as banned_users,
+                           pm.pending_moderation
+                    FROM (
+                        SELECT COUNT(*) as pending_moderation
+                        FROM (
+                            SELECT 1
+                            FROM moderation_queue mq
+                            LEFT JOIN blog_posts bp ON mq.content_type = 'blog_post' AND mq.content_id = bp.id
+                            LEFT JOIN pages p ON mq.content_type = 'page' AND mq.content_id = p.id
+                            WHERE mq.status = 'pending' AND (bp.group_id = %s OR p.group_id = %s)
+                            LIMIT %s
+                        ) pending
+                    ) pm
+                    LEFT JOIN mv_admin_dashboard_stats_by_group s ON s.group_id = %s
+                """, (group_id, group_id, PENDING_MODERATION_COUNT_CAP + 1, group_id))
             
             stats = cursor.fetchone()
             
-            # Get recent user activity
+            # Get recent user activity. The LIMIT is applied to the log before
+            # joining users so only 20 rows are read off the created_at index;
+            # for a group, each member's latest 20 come off (user_id, created_at)
             if user_role == 'SuperAdmin':
                 cursor.execute("""
-                    SELECT ual.*, u.username
-                    FROM user_activity_logs ual
+                    SELECT ual.action, ual.resource_type, ual.created_at, u.username
+                    FROM (
+                        SELECT user_id, action, resource_type, created_at
+                        FROM user_activity_logs
+                        WHERE user_id IS NOT NULL
+                        ORDER BY created_at DESC
+                        LIMIT 20
+                    ) ual
                     JOIN users u ON ual.user_id = u.id
                     ORDER BY ual.created_at DESC
-                    LIMIT 20
                 """)
             else:
                 cursor.execute("""
-                    SELECT ual.*, u.username
-                    FROM user_activity_logs ual
-                    JOIN users u ON ual.user_id = u.id
+                    SELECT ual.action, ual.resource_type, ual.created_at, u.username
+                    FROM users u
+                    CROSS JOIN LATERAL (
+                        SELECT action, resource_type, created_at
+                        FROM user_activity_logs
+                        WHERE user_id = u.id
+                        ORDER BY created_at DESC
+                        LIMIT 20
+                    ) ual
                     WHERE u.group_id = %s
                     ORDER BY ual.created_at DESC
                     LIMIT 20
@@ -77,12 +263,13 @@ def dashboard():
             recent_activity = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('admin/dashboard.html', 
                                  stats=stats, 
                                  recent_activity=recent_activity,
-                                 user_role=user_role)
+                                 user_role=user_role,
+                                 pending_cap=PENDING_MODERATION_COUNT_CAP)
         else:
             flash('Database connection error', 'danger')
             return render_template('admin/dashboard.html')
@@ -97,43 +284,67 @@ def dashboard():
 def manage_users():
     """User management page"""
     try:
+        user_role = session['user_role']
+        group_id = session.get('group_id')
+
+        # Keyset cursor for paging back through users (?after=<iso>&after_id=<id>)
+        after = _parse_after(request.args.get('after'))
+        after_id = request.args.get('after_id', type=int)
+        if after_id is None:
+            after = None
+
+        # Served from cache until the TTL expires or a user/group is written
+        cache_key = f"user_list:{user_role}:{group_id}:{after}:{after_id}"
+        cached = cache_get(cache_key)
+        if cached is not None:
+            users, roles = cached
+            return _render_conditional('admin/users.html', users=users, roles=roles,
+                                       per_page=USERS_PER_PAGE)
+
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            user_role = session['user_role']
-            group_id = session.get('group_id')
+            cursor = conn.cursor(cursor_factory=NamedTupleCursor)
             
             if user_role == 'SuperAdmin':
                 # SuperAdmin sees all users
                 cursor.execute("""
-                    SELECT u.*, r.name as role_name, g.name as group_name
+                    SELECT u.id, u.username, u.email, u.first_name, u.last_name,
+                           u.is_active, u.is_banned, u.created_at,
+                           r.name as role_name, g.name as group_name
                     FROM users u
                     JOIN roles r ON u.role_id = r.id
                     LEFT JOIN groups g ON u.group_id = g.id
-                    ORDER BY u.created_at DESC
-                """)
+                    WHERE (%s::timestamp IS NULL OR (u.created_at, u.id) < (%s, %s))
+                    ORDER BY u.created_at DESC, u.id DESC
+                    LIMIT %s
+                """, (after, after, after_id, USERS_PER_PAGE))
             else:
                 # Admin sees only users in their group
                 cursor.execute("""
-                    SELECT u.*, r.name as role_name, g.name as group_name
+                    SELECT u.id, u.username, u.email, u.first_name, u.last_name,
+                           u.is_active, u.is_banned, u.created_at,
+                           r.name as role_name, g.name as group_name
                     FROM users u
                     JOIN roles r ON u.role_id = r.id
                     JOIN groups g ON u.group_id = g.id
                     WHERE u.group_id = %s
-                    ORDER BY u.created_at DESC
-                """, (group_id,))
+                          AND (%s::timestamp IS NULL OR (u.created_at, u.id) < (%s, %s))
+                    ORDER BY u.created_at DESC, u.id DESC
+                    LIMIT %s
+                """, (group_id, after, after, after_id, USERS_PER_PAGE))
             
             users = cursor.fetchall()
             
             # Get available roles
-            cursor.execute("SELECT id, name, description FROM roles ORDER BY id")
-            roles = cursor.fetchall()
+            roles = _get_roles(conn)
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
+
+            cache_set(cache_key, (users, roles), LIST_CACHE_TIMEOUT)
             
-            return render_template('admin/users.html', users=users, roles=roles)
+            return _render_conditional('admin/users.html', users=users, roles=roles,
+                                       per_page=USERS_PER_PAGE)
         else:
             flash('Database connection error', 'danger')
             return render_template('admin/users.html', users=[], roles=[])
@@ -199,103 +410,119 @@ def create_user():
             # Admin users can only create within their own group
             group_id = session.get('group_id')
 
+        # Hash before checking out a connection so the slow key derivation
+        # doesn't hold a pooled connection
+        password_hash = hash_password(password)
+
         try:
             conn = get_db_connection()
             if conn:
                 cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-                # Check if user already exists
-                cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s",
-                             (username, email))
-                if cursor.fetchone():
-                    flash('Username or email already exists.', 'danger')
-                    cursor.close()
-                    conn.close()
-                    return redirect(url_for('admin.create_user'))
-
-                # Get the selected role to validate permissions
-                cursor.execute("SELECT name FROM roles WHERE id = %s", (role_id,))
-                role_result = cursor.fetchone()
-
-                if not role_result:
-                    flash('Invalid role selected.', 'danger')
-                    cursor.close()
-                    conn.close()
-                    return redirect(url_for('admin.create_user'))
-
-                role_name = role_result['name']
-
-                # Validate: Admin can only create User and SuperUser roles within their group
-                if session['user_role'] == 'Admin':
+                # Validate and create the user (plus the organization of a new
+                # Admin) in one round trip. The user and group ids are drawn up
+                # front so each row can name the other; both foreign keys are
+                # checked at the end of the statement. The group is only
+                # inserted from the user row actually written, so losing a
+                # username/email race writes nothing. Nothing is written if a
+                # check fails, and the flags returned say which one.
+                cursor.execute("""
+                    WITH dup AS (
+                        SELECT EXISTS (SELECT 1 FROM users WHERE username = %(username)s)
+                               OR EXISTS (SELECT 1 FROM users WHERE email = %(email)s) as taken
+                    ), org AS (
+                        SELECT EXISTS (SELECT 1 FROM groups WHERE name = %(org_name)s) as taken
+                    ), ok AS (
+                        SELECT r.name as role_name,
+                               nextval(pg_get_serial_sequence('users', 'id')) as user_id,
+                               CASE WHEN %(creator_role)s = 'SuperAdmin' AND r.name = 'Admin'
+                                    THEN nextval(pg_get_serial_sequence('groups', 'id'))
+                               END as new_group_id
+                        FROM roles r, dup, org
+                        WHERE r.id = %(role_id)s AND NOT dup.taken
+                              AND CASE
+                                  WHEN %(creator_role)s = 'Admin' THEN
+                                      r.name IN ('User', 'SuperUser') AND %(group_id)s::integer IS NOT NULL
+                                  WHEN r.name = 'Admin' THEN %(org_name)s <> '' AND NOT org.taken
+                                  WHEN r.name <> 'SuperAdmin' THEN %(group_id)s::integer IS NOT NULL
+                                  ELSE TRUE
+                              END
+                    ), new_user AS (
+                        INSERT INTO users (id, username, email, password_hash, first_name, last_name, role_id, group_id)
+                        SELECT ok.user_id, %(username)s, %(email)s, %(password_hash)s, %(first_name)s,
+                               %(last_name)s, %(role_id)s,
+                               COALESCE(ok.new_group_id, %(group_id)s::integer)
+                        FROM ok
+                        ON CONFLICT DO NOTHING
+                        RETURNING id, group_id
+                    ), new_group AS (
+                        INSERT INTO groups (id, name, description, admin_user_id, is_active)
+                        SELECT ok.new_group_id, %(org_name)s, %(org_description)s, new_user.id, TRUE
+                        FROM ok
+                        JOIN new_user ON new_user.id = ok.user_id
+                        WHERE ok.new_group_id IS NOT NULL
+                        RETURNING id
+                    )
+                    SELECT dup.taken as duplicate, org.taken as org_taken,
+                           (SELECT name FROM roles WHERE id = %(role_id)s) as role_name,
+                           (SELECT id FROM new_group) as new_group_id,
+                           (SELECT id FROM new_user) as user_id
+                    FROM dup, org
+                """, {
+                    'username': username, 'email': email, 'password_hash': password_hash,
+                    'first_name': first_name, 'last_name': last_name, 'role_id': role_id,
+                    'group_id': group_id, 'creator_role': session['user_role'],
+                    'org_name': organization_name if session['user_role'] == 'SuperAdmin' else '',
+                    'org_description': (organization_description or f'Organization for {organization_name}')
+                                       if session['user_role'] == 'SuperAdmin' else '',
+                })
+                result = cursor.fetchone()
+                role_name = result['role_name']
+                user_id = result['user_id']
+
+                error = None
+                if result['duplicate']:
+                    error = 'Username or email already exists.'
+                elif not role_name:
+                    error = 'Invalid role selected.'
+                elif session['user_role'] == 'Admin':
+                    # Admin can only create User and SuperUser roles within their group
                     if role_name not in ['User', 'SuperUser']:
-                        flash('You can only create User and SuperUser roles.', 'danger')
-                        cursor.close()
-                        conn.close()
-                        return redirect(url_for('admin.create_user'))
-
-                    if not group_id:
-                        flash('Admin users must be assigned to a group.', 'danger')
-                        cursor.close()
-                        conn.close()
-                        return redirect(url_for('admin.create_user'))
-
-                # SuperAdmin creating an Admin user: Auto-create organization
-                if session['user_role'] == 'SuperAdmin' and role_name == 'Admin':
+                        error = 'You can only create User and SuperUser roles.'
+                    elif not group_id:
+                        error = 'Admin users must be assigned to a group.'
+                elif role_name == 'Admin':
+                    # SuperAdmin creating an Admin user auto-creates the organization
                     if not organization_name:
-                        flash('Organization name is required when creating an Admin user.', 'danger')
-                        cursor.close()
-                        conn.close()
-                        return redirect(url_for('admin.create_user'))
-
-                    # Check if organization name already exists
-                    cursor.execute("SELECT id FROM groups WHERE name = %s", (organization_name,))
-                    if cursor.fetchone():
-                        flash(f'Organization "{organization_name}" already exists. Please choose a different name.', 'danger')
-                        cursor.close()
-                        conn.close()
-                        return redirect(url_for('admin.create_user'))
-
-                    # Create the organization first (without admin_user_id, we'll update it after creating user)
-                    cursor.execute("""
-                        INSERT INTO groups (name, description, is_active)
-                        VALUES (%s, %s, TRUE)
-                        RETURNING id
-                    """, (organization_name, organization_description or f'Organization for {organization_name}'))
-
-                    group_id = cursor.fetchone()['id']
-                    logger.info(f"Created organization '{organization_name}' with ID {group_id}")
-
-                # Validate: Non-Admin users created by SuperAdmin should have a group selected
-                if session['user_role'] == 'SuperAdmin' and role_name != 'Admin' and role_name != 'SuperAdmin':
-                    if not group_id:
-                        flash('Please select an organization for this user.', 'danger')
-                        cursor.close()
-                        conn.close()
-                        return redirect(url_for('admin.create_user'))
+                        error = 'Organization name is required when creating an Admin user.'
+                    elif result['org_taken']:
+                        error = f'Organization "{organization_name}" already exists. Please choose a different name.'
+                elif role_name != 'SuperAdmin' and not group_id:
+                    # Non-Admin users created by SuperAdmin need an organization
+                    error = 'Please select an organization for this user.'
+
+                if not error and not user_id:
+                    # Lost a race: the username or email was taken after the check
+                    error = 'Username or email already exists.'
+
+                if error:
+                    conn.rollback()
+                    flash(error, 'danger')
+                    cursor.close()
+                    release_db_connection(conn)
+                    return redirect(url_for('admin.create_user'))
 
-                # Create user
-                password_hash = generate_password_hash(password)
-                cursor.execute("""
-                    INSERT INTO users (username, email, password_hash, first_name, last_name, role_id, group_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                """, (
-                    username, email, password_hash, first_name, last_name,
-                    role_id, group_id
-                ))
-
-                user_id = cursor.fetchone()['id']
-
-                # If we created an Admin user with a new organization, link them
-                if session['user_role'] == 'SuperAdmin' and role_name == 'Admin' and group_id:
-                    cursor.execute("""
-                        UPDATE groups SET admin_user_id = %s WHERE id = %s
-                    """, (user_id, group_id))
-                    logger.info(f"Linked Admin user {user_id} to organization {group_id}")
+                if result['new_group_id']:
+                    cache_delete('admin:groups')
+                    logger.info(f"Created organization '{organization_name}' with ID {result['new_group_id']} "
+                                f"for Admin user {user_id}")
 
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
+
+                cache_delete('user_list:')
+                cache_delete('group_list')
 
                 # Log activity
                 log_user_activity(session['user_id'], 'create_user', 'user', user_id)
@@ -303,51 +530,39 @@ def create_user():
                 flash('User created successfully!', 'success')
                 return redirect(url_for('admin.manage_users'))
 
+        except psycopg2.IntegrityError:
+            # A concurrent insert took the organization name after the check
+            conn.rollback()
+            cursor.close()
+            release_db_connection(conn)
+            flash('Username, email or organization name already exists.', 'danger')
+            return redirect(url_for('admin.create_user'))
         except Exception as e:
             if 'conn' in locals() and conn:
                 conn.rollback()
                 if 'cursor' in locals() and cursor:
                     cursor.close()
-                conn.close()
+                release_db_connection(conn)
             flash(f'Error creating user: {str(e)}', 'danger')
             logger.error(f"Error creating user: {type(e).__name__}: {str(e)}")
             logger.exception("Full traceback:")
             return redirect(url_for('admin.create_user'))
 
     try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+        # Both lists are cached, so the form usually renders without a query
 
-            # Get available roles based on user's role
-            if session['user_role'] == 'SuperAdmin':
-                cursor.execute("SELECT id, name, description FROM roles ORDER BY id")
-            else:
-                # Admin can only create User and SuperUser roles
-                cursor.execute("""
-                    SELECT id, name, description FROM roles
-                    WHERE name IN ('User', 'SuperUser')
-                    ORDER BY id
-                """)
-            roles = cursor.fetchall()
-
-            # Get available groups (only for SuperAdmin)
-            groups = []
-            if session['user_role'] == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT id, name FROM groups
-                    WHERE is_active = TRUE
-                    ORDER BY name
-                """)
-                groups = cursor.fetchall()
+        # Get available roles based on user's role
+        roles = _get_roles()
+        if session['user_role'] != 'SuperAdmin':
+            # Admin can only create User and SuperUser roles
+            roles = [role for role in roles if role['name'] in ('User', 'SuperUser')]
 
-            cursor.close()
-            conn.close()
+        # Get available groups (only for SuperAdmin)
+        groups = []
+        if session['user_role'] == 'SuperAdmin':
+            groups = _get_active_groups()
 
-            return render_template('admin/create_user.html', roles=roles, groups=groups)
-        else:
-            flash('Database connection error', 'danger')
-            return render_template('admin/create_user.html', roles=[], groups=[])
+        return render_template('admin/create_user.html', roles=roles, groups=groups)
 
     except Exception as e:
         flash('Error loading roles', 'danger')
@@ -401,11 +616,13 @@ def edit_user(user_id):
                 cursor.execute("""
                     UPDATE users
                     SET first_name = %s, last_name = %s, role_id = %s, group_id = %s,
-                        is_active = %s, is_banned = %s, updated_at = %s
+                        is_active = %s, is_banned = %s, updated_at = CURRENT_TIMESTAMP
                     WHERE id = %s
-                """, (first_name, last_name, role_id, group_id, is_active, is_banned, datetime.utcnow(), user_id))
+                """, (first_name, last_name, role_id, group_id, is_active, is_banned, user_id))
 
                 conn.commit()
+                cache_delete('user_list:')
+                cache_delete('group_list')
 
                 # Log activity
                 log_user_activity(session['user_id'], 'edit_user', 'user', user_id)
@@ -414,21 +631,15 @@ def edit_user(user_id):
                 return redirect(url_for('admin.manage_users'))
             
             # Get available roles
-            cursor.execute("SELECT id, name, description FROM roles ORDER BY id")
-            roles = cursor.fetchall()
+            roles = _get_roles(conn)
 
             # Get available groups (only for SuperAdmin)
             groups = []
             if session['user_role'] == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT id, name FROM groups
-                    WHERE is_active = TRUE
-                    ORDER BY name
-                """)
-                groups = cursor.fetchall()
+                groups = _get_active_groups(conn)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             return render_template('admin/edit_user.html', user=user, roles=roles, groups=groups)
         else:
@@ -448,26 +659,26 @@ def ban_user(user_id):
     try:
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor()
             
-            # Get user
-            cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-            user = cursor.fetchone()
+            # Flip the ban atomically, only within the moderator's reach
+            cursor.execute("EXECUTE toggle_user_ban(%s, %s, %s)",
+                           (user_id, session['user_role'], session.get('group_id')))
+            result = cursor.fetchone()
             
-            if not user:
+            if not result:
+                # Nothing updated: tell a missing user apart from one outside the group
+                cursor.execute("SELECT EXISTS (SELECT 1 FROM users WHERE id = %s)", (user_id,))
+                if cursor.fetchone()[0]:
+                    return jsonify({'success': False, 'message': 'Permission denied'}), 403
                 return jsonify({'success': False, 'message': 'User not found'}), 404
             
-            # Check permissions
-            if session['user_role'] == 'Admin' and user['group_id'] != session.get('group_id'):
-                return jsonify({'success': False, 'message': 'Permission denied'}), 403
-            
-            # Toggle ban status
-            new_status = not user['is_banned']
-            cursor.execute("UPDATE users SET is_banned = %s WHERE id = %s", (new_status, user_id))
+            new_status = result[0]
             conn.commit()
+            cache_delete('user_list:')
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             # Log activity
             action = 'ban_user' if new_status else 'unban_user'
@@ -489,25 +700,46 @@ def ban_user(user_id):
 def manage_groups():
     """Group management page (SuperAdmin only)"""
     try:
+        # Served from cache until the TTL expires or a user/group is written
+        groups = cache_get('group_list')
+        if groups is not None:
+            return _render_conditional('admin/groups.html', groups=groups)
+
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor(cursor_factory=NamedTupleCursor)
 
             cursor.execute("""
-                SELECT g.*, u.username as admin_username, u.email as admin_email, t.name as theme_name,
-                       (SELECT COUNT(*) FROM users WHERE group_id = g.id) as user_count,
-                       (SELECT COUNT(*) FROM blog_posts WHERE group_id = g.id) as post_count
+                WITH uc AS (
+                    SELECT group_id, COUNT(*) as user_count
+                    FROM users
+                    WHERE group_id IS NOT NULL
+                    GROUP BY group_id
+                ), pc AS (
+                    SELECT group_id, COUNT(*) as post_count
+                    FROM blog_posts
+                    WHERE group_id IS NOT NULL
+                    GROUP BY group_id
+                )
+                SELECT g.id, g.name, g.description, g.is_active, g.created_at,
+                       u.username as admin_username, u.email as admin_email, t.name as theme_name,
+                       COALESCE(uc.user_count, 0) as user_count,
+                       COALESCE(pc.post_count, 0) as post_count
                 FROM groups g
                 LEFT JOIN users u ON g.admin_user_id = u.id
                 LEFT JOIN themes t ON g.theme_id = t.id
+                LEFT JOIN uc ON uc.group_id = g.id
+                LEFT JOIN pc ON pc.group_id = g.id
                 ORDER BY g.created_at DESC
             """)
             groups = cursor.fetchall()
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
-            return render_template('admin/groups.html', groups=groups)
+            cache_set('group_list', groups, LIST_CACHE_TIMEOUT)
+
+            return _render_conditional('admin/groups.html', groups=groups)
         else:
             flash('Database connection error', 'danger')
             return render_template('admin/groups.html', groups=[])
@@ -547,32 +779,37 @@ def create_group():
             if conn:
                 cursor = conn.cursor()
 
-                # Check if group name already exists
-                cursor.execute("SELECT id FROM groups WHERE name = %s", (name,))
-                if cursor.fetchone():
+                # Create group and move its admin user into it in one statement;
+                # a taken name inserts nothing and returns no row
+                cursor.execute("""
+                    WITH new_group AS (
+                        INSERT INTO groups (name, description, admin_user_id, theme_id)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (name) DO NOTHING
+                        RETURNING id
+                    ), moved_admin AS (
+                        UPDATE users SET group_id = new_group.id
+                        FROM new_group
+                        WHERE users.id = %s
+                    )
+                    SELECT id FROM new_group
+                """, (name, description, admin_user_id or None, theme_id, admin_user_id or None))
+
+                result = cursor.fetchone()
+                if not result:
                     flash('Group name already exists.', 'danger')
                     cursor.close()
-                    conn.close()
+                    release_db_connection(conn)
                     return redirect(url_for('admin.create_group'))
 
-                # Create group
-                cursor.execute("""
-                    INSERT INTO groups (name, description, admin_user_id, theme_id)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id
-                """, (name, description, admin_user_id if admin_user_id else None, theme_id))
-
-                group_id = cursor.fetchone()[0]
-
-                # Update admin user's group_id
-                if admin_user_id:
-                    cursor.execute("""
-                        UPDATE users SET group_id = %s WHERE id = %s
-                    """, (group_id, admin_user_id))
+                group_id = result[0]
 
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
+                cache_delete('admin:groups')
+                cache_delete('group_list')
+                cache_delete('user_list:')
 
                 # Log activity
                 log_user_activity(session['user_id'], 'create_group', 'group', group_id)
@@ -601,17 +838,11 @@ def create_group():
             """)
             available_admins = cursor.fetchall()
 
-            # Get all themes
-            cursor.execute("""
-                SELECT id, name, description, theme_type
-                FROM themes
-                WHERE is_active = TRUE
-                ORDER BY name
-            """)
-            themes = cursor.fetchall()
+            # Get all active themes
+            themes = [theme for theme in _get_themes(conn) if theme['is_active']]
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             return render_template('admin/create_group.html',
                                  available_admins=available_admins,
@@ -651,7 +882,7 @@ def edit_group(group_id):
             if not group:
                 flash('Group not found', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('admin.manage_groups'))
 
             if request.method == 'POST':
@@ -672,27 +903,42 @@ def edit_group(group_id):
                 else:
                     theme_id = None
 
-                # Check if name is taken by another group
-                cursor.execute("SELECT id FROM groups WHERE name = %s AND id != %s", (name, group_id))
-                if cursor.fetchone():
+                # Update group and move its admin user into it in one statement.
+                # The update is skipped when another group has the name; the
+                # UNIQUE constraint catches one renamed concurrently
+                try:
+                    cursor.execute("""
+                        WITH updated_group AS (
+                            UPDATE groups
+                            SET name = %s, description = %s, admin_user_id = %s, theme_id = %s,
+                                contact_page_content = %s, about_page_content = %s,
+                                is_active = %s, updated_at = CURRENT_TIMESTAMP
+                            WHERE id = %s
+                                  AND NOT EXISTS (SELECT 1 FROM groups WHERE name = %s AND id != %s)
+                            RETURNING id
+                        ), moved_admin AS (
+                            UPDATE users SET group_id = updated_group.id
+                            FROM updated_group
+                            WHERE users.id = %s
+                        )
+                        SELECT id FROM updated_group
+                    """, (name, description, admin_user_id or None, theme_id,
+                          contact_page_content, about_page_content, is_active, group_id,
+                          name, group_id, admin_user_id or None))
+                    updated = cursor.fetchone()
+                except psycopg2.IntegrityError:
+                    conn.rollback()
+                    updated = None
+
+                if not updated:
+                    # The group itself was loaded above, so the name is what clashed
+                    conn.rollback()
                     flash('Group name already exists.', 'danger')
                 else:
-                    # Update group
-                    cursor.execute("""
-                        UPDATE groups
-                        SET name = %s, description = %s, admin_user_id = %s, theme_id = %s,
-                            contact_page_content = %s, about_page_content = %s,
-                            is_active = %s, updated_at = %s
-                        WHERE id = %s
-                    """, (name, description, admin_user_id if admin_user_id else None, theme_id,
-                          contact_page_content, about_page_content, is_active,
-                          datetime.utcnow(), group_id))
-
-                    # Update admin user's group_id
-                    if admin_user_id:
-                        cursor.execute("UPDATE users SET group_id = %s WHERE id = %s", (group_id, admin_user_id))
-
                     conn.commit()
+                    cache_delete('admin:groups')
+                    cache_delete('group_list')
+                    cache_delete('user_list:')
 
                     # Log activity
                     log_user_activity(session['user_id'], 'edit_group', 'group', group_id)
@@ -711,11 +957,10 @@ def edit_group(group_id):
             available_admins = cursor.fetchall()
 
             # Get themes
-            cursor.execute("SELECT id, name FROM themes ORDER BY name")
-            themes = cursor.fetchall()
+            themes = _get_themes(conn)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             return render_template('admin/edit_group.html', group=group,
                                  available_admins=available_admins, themes=themes)
@@ -738,59 +983,84 @@ def view_group(group_id):
         if conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-            # Get group details
+            # Keyset cursors for paging back through users/posts
+            # (?users_after=<iso>&users_after_id=<id>)
+            users_after = _parse_after(request.args.get('users_after'))
+            users_after_id = request.args.get('users_after_id', type=int)
+            if users_after_id is None:
+                users_after = None
+            posts_after = _parse_after(request.args.get('posts_after'))
+            posts_after_id = request.args.get('posts_after_id', type=int)
+            if posts_after_id is None:
+                posts_after = None
+
+            # Get group details, statistics and the recent users/posts lists in
+            # one round-trip; users is scanned once and FILTER derives the
+            # active count from the same pass
             cursor.execute("""
-                SELECT g.*, u.username as admin_username, u.email as admin_email,
+                SELECT g.id, g.name, g.description, g.is_active, g.created_at, g.updated_at,
+                       g.contact_page_content, g.about_page_content,
+                       u.username as admin_username, u.email as admin_email,
                        u.first_name as admin_first_name, u.last_name as admin_last_name,
-                       t.name as theme_name
+                       t.name as theme_name,
+                       us.total_users, us.active_users,
+                       (SELECT COUNT(*) FROM blog_posts WHERE group_id = g.id) as total_posts,
+                       (SELECT COUNT(*) FROM pages WHERE group_id = g.id) as total_pages,
+                       (SELECT jsonb_agg(gu) FROM (
+                            SELECT u2.id, u2.username, u2.first_name, u2.last_name, u2.email,
+                                   u2.is_active, r.name as role_name,
+                                   to_char(u2.created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US') as created_at
+                            FROM users u2
+                            JOIN roles r ON u2.role_id = r.id
+                            WHERE u2.group_id = g.id
+                                  AND (%s::timestamp IS NULL OR (u2.created_at, u2.id) < (%s, %s))
+                            ORDER BY u2.created_at DESC, u2.id DESC
+                            LIMIT 10
+                       ) gu) as recent_users,
+                       (SELECT jsonb_agg(gp) FROM (
+                            SELECT bp.id, bp.title, bp.is_published, bp.view_count,
+                                   u3.username as author_username,
+                                   to_char(bp.created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US') as created_at
+                            FROM blog_posts bp
+                            JOIN users u3 ON bp.author_id = u3.id
+                            WHERE bp.group_id = g.id
+                                  AND (%s::timestamp IS NULL OR (bp.created_at, bp.id) < (%s, %s))
+                            ORDER BY bp.created_at DESC, bp.id DESC
+                            LIMIT 10
+                       ) gp) as recent_posts
                 FROM groups g
                 LEFT JOIN users u ON g.admin_user_id = u.id
                 LEFT JOIN themes t ON g.theme_id = t.id
+                CROSS JOIN LATERAL (
+                    SELECT COUNT(*) as total_users,
+                           COUNT(*) FILTER (WHERE is_active = TRUE) as active_users
+                    FROM users
+                    WHERE group_id = g.id
+                ) us
                 WHERE g.id = %s
-            """, (group_id,))
+            """, (users_after, users_after, users_after_id,
+                  posts_after, posts_after, posts_after_id, group_id))
             group = cursor.fetchone()
 
             if not group:
                 flash('Group not found', 'danger')
                 return redirect(url_for('admin.manage_groups'))
 
-            # Get group statistics
-            cursor.execute("""
-                SELECT
-                    (SELECT COUNT(*) FROM users WHERE group_id = %s) as total_users,
-                    (SELECT COUNT(*) FROM blog_posts WHERE group_id = %s) as total_posts,
-                    (SELECT COUNT(*) FROM pages WHERE group_id = %s) as total_pages,
-                    (SELECT COUNT(*) FROM users WHERE group_id = %s AND is_active = TRUE) as active_users
-            """, (group_id, group_id, group_id, group_id))
-            stats = cursor.fetchone()
+            stats = {key: group.pop(key)
+                     for key in ('total_users', 'active_users', 'total_posts', 'total_pages')}
 
-            # Get group users
-            cursor.execute("""
-                SELECT u.*, r.name as role_name
-                FROM users u
-                JOIN roles r ON u.role_id = r.id
-                WHERE u.group_id = %s
-                ORDER BY u.created_at DESC
-                LIMIT 10
-            """, (group_id,))
-            users = cursor.fetchall()
-
-            # Get recent blog posts
-            cursor.execute("""
-                SELECT bp.*, u.username as author_username
-                FROM blog_posts bp
-                JOIN users u ON bp.author_id = u.id
-                WHERE bp.group_id = %s
-                ORDER BY bp.created_at DESC
-                LIMIT 10
-            """, (group_id,))
-            posts = cursor.fetchall()
+            # jsonb_agg returns NULL for no rows and timestamps as ISO strings
+            users = group.pop('recent_users') or []
+            posts = group.pop('recent_posts') or []
+            for row in users + posts:
+                if row['created_at']:
+                    row['created_at'] = datetime.fromisoformat(row['created_at'])
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
-            return render_template('admin/view_group.html', group=group, stats=stats,
-                                 users=users, posts=posts)
+            return _render_conditional('admin/view_group.html', group=group, stats=stats,
+                                       users=users, posts=posts)
         else:
             flash('Database connection error', 'danger')
             return redirect(url_for('admin.manage_groups'))
@@ -810,18 +1080,16 @@ def delete_group(group_id):
         if conn:
             cursor = conn.cursor()
 
-            # Check if group exists
-            cursor.execute("SELECT id FROM groups WHERE id = %s", (group_id,))
+            # Soft delete - set is_active to false (no row returned if the group doesn't exist)
+            cursor.execute("EXECUTE deactivate_group(%s)", (group_id,))
             if not cursor.fetchone():
                 return jsonify({'success': False, 'message': 'Group not found'}), 404
-
-            # Soft delete - set is_active to false
-            cursor.execute("UPDATE groups SET is_active = FALSE, updated_at = %s WHERE id = %s",
-                         (datetime.utcnow(), group_id))
             conn.commit()
+            cache_delete('admin:groups')
+            cache_delete('group_list')
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             # Log activity
             log_user_activity(session['user_id'], 'delete_group', 'group', group_id)
@@ -840,23 +1108,22 @@ def toggle_group(group_id):
     try:
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor()
 
-            # Get current status
-            cursor.execute("SELECT is_active FROM groups WHERE id = %s", (group_id,))
+            # Flip the status atomically and read back the new value
+            cursor.execute("EXECUTE toggle_group_status(%s)", (group_id,))
             result = cursor.fetchone()
 
             if not result:
                 return jsonify({'success': False, 'message': 'Group not found'}), 404
 
-            # Toggle status
-            new_status = not result['is_active']
-            cursor.execute("UPDATE groups SET is_active = %s, updated_at = %s WHERE id = %s",
-                         (new_status, datetime.utcnow(), group_id))
+            new_status = result[0]
             conn.commit()
+            cache_delete('admin:groups')
+            cache_delete('group_list')
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             # Log activity
             action = 'activate_group' if new_status else 'deactivate_group'
@@ -878,36 +1145,63 @@ def toggle_group(group_id):
 def activity_logs():
     """View user activity logs"""
     try:
+        user_role = session['user_role']
+        group_id = session.get('group_id')
+
+        # Keyset cursor for paging back through the log (?after=<iso>&after_id=<id>)
+        after = _parse_after(request.args.get('after'))
+        after_id = request.args.get('after_id', type=int)
+        if after_id is None:
+            after = None
+
+        # Served from cache until the TTL expires or a new activity is logged
+        cache_key = f"activity_logs:{user_role}:{group_id}:{after}:{after_id}"
+        logs = cache_get(cache_key)
+        if logs is not None:
+            return _render_conditional('admin/activity_logs.html', logs=logs,
+                                       per_page=ACTIVITY_LOGS_PER_PAGE)
+
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            user_role = session['user_role']
-            group_id = session.get('group_id')
-            
+            cursor = conn.cursor(cursor_factory=NamedTupleCursor)
+
             if user_role == 'SuperAdmin':
                 cursor.execute("""
-                    SELECT ual.*, u.username
+                    SELECT ual.id, ual.action, ual.resource_type, ual.ip_address, ual.created_at,
+                           u.username
                     FROM user_activity_logs ual
                     JOIN users u ON ual.user_id = u.id
-                    ORDER BY ual.created_at DESC
-                    LIMIT 100
-                """)
+                    WHERE (%s::timestamp IS NULL OR (ual.created_at, ual.id) < (%s, %s))
+                    ORDER BY ual.created_at DESC, ual.id DESC
+                    LIMIT %s
+                """, (after, after, after_id, ACTIVITY_LOGS_PER_PAGE))
             else:
+                # Each member's page comes off (user_id, created_at DESC), then merged
                 cursor.execute("""
-                    SELECT ual.*, u.username
-                    FROM user_activity_logs ual
-                    JOIN users u ON ual.user_id = u.id
+                    SELECT ual.id, ual.action, ual.resource_type, ual.ip_address, ual.created_at,
+                           u.username
+                    FROM users u
+                    CROSS JOIN LATERAL (
+                        SELECT id, action, resource_type, ip_address, created_at
+                        FROM user_activity_logs
+                        WHERE user_id = u.id
+                              AND (%s::timestamp IS NULL OR (created_at, id) < (%s, %s))
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT %s
+                    ) ual
                     WHERE u.group_id = %s
-                    ORDER BY ual.created_at DESC
-                    LIMIT 100
-                """, (group_id,))
+                    ORDER BY ual.created_at DESC, ual.id DESC
+                    LIMIT %s
+                """, (after, after, after_id, ACTIVITY_LOGS_PER_PAGE, group_id, ACTIVITY_LOGS_PER_PAGE))
             
             logs = cursor.fetchall()
             cursor.close()
-            conn.close()
-            
-            return render_template('admin/activity_logs.html', logs=logs)
+            release_db_connection(conn)
+
+            cache_set(cache_key, logs, ACTIVITY_LOGS_CACHE_TIMEOUT)
+
+            return _render_conditional('admin/activity_logs.html', logs=logs,
+                                       per_page=ACTIVITY_LOGS_PER_PAGE)
         else:
             flash('Database connection error', 'danger')
             return render_template('admin/activity_logs.html', logs=[])
@@ -929,73 +1223,6 @@ def moderation_queue():
             user_role = session['user_role']
             group_id = session.get('group_id')
 
-            # Fetch pending items with content details
-            queue_items = []
-
-            # Get blog posts pending moderation
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT mq.id as queue_id, mq.content_type, mq.content_id, mq.status,
-                           mq.created_at, mq.review_notes,
-                           bp.title, bp.excerpt, bp.slug, bp.is_published,
-                           u.id as author_id, u.username, u.first_name, u.last_name, u.email,
-                           g.name as group_name
-                    FROM moderation_queue mq
-                    JOIN blog_posts bp ON mq.content_id = bp.id
-                    JOIN users u ON bp.author_id = u.id
-                    LEFT JOIN groups g ON bp.group_id = g.id
-                    WHERE mq.content_type = 'blog_post' AND mq.status = 'pending'
-                    ORDER BY mq.created_at DESC
-                """)
-            else:
-                cursor.execute("""
-                    SELECT mq.id as queue_id, mq.content_type, mq.content_id, mq.status,
-                           mq.created_at, mq.review_notes,
-                           bp.title, bp.excerpt, bp.slug, bp.is_published,
-                           u.id as author_id, u.username, u.first_name, u.last_name, u.email
-                    FROM moderation_queue mq
-                    JOIN blog_posts bp ON mq.content_id = bp.id
-                    JOIN users u ON bp.author_id = u.id
-                    WHERE mq.content_type = 'blog_post' AND mq.status = 'pending'
-                          AND bp.group_id = %s
-                    ORDER BY mq.created_at DESC
-                """, (group_id,))
-
-            blog_posts = cursor.fetchall()
-            queue_items.extend(blog_posts)
-
-            # Get pages pending moderation
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT mq.id as queue_id, mq.content_type, mq.content_id, mq.status,
-                           mq.created_at, mq.review_notes,
-                           p.title, p.slug, p.is_published,
-                           u.id as author_id, u.username, u.first_name, u.last_name, u.email,
-                           g.name as group_name
-                    FROM moderation_queue mq
-                    JOIN pages p ON mq.content_id = p.id
-                    JOIN users u ON p.author_id = u.id
-                    LEFT JOIN groups g ON p.group_id = g.id
-                    WHERE mq.content_type = 'page' AND mq.status = 'pending'
-                    ORDER BY mq.created_at DESC
-                """)
-            else:
-                cursor.execute("""
-                    SELECT mq.id as queue_id, mq.content_type, mq.content_id, mq.status,
-                           mq.created_at, mq.review_notes,
-                           p.title, p.slug, p.is_published,
-                           u.id as author_id, u.username, u.first_name, u.last_name, u.email
-                    FROM moderation_queue mq
-                    JOIN pages p ON mq.content_id = p.id
-                    JOIN users u ON p.author_id = u.id
-                    WHERE mq.content_type = 'page' AND mq.status = 'pending'
-                          AND p.group_id = %s
-                    ORDER BY mq.created_at DESC
-                """, (group_id,))
-
-            pages = cursor.fetchall()
-            queue_items.extend(pages)
-
             # Get moderation stats
             if user_role == 'SuperAdmin':
                 cursor.execute("""
@@ -1021,10 +1248,37 @@ def moderation_queue():
 
             stats = cursor.fetchone()
 
-            cursor.close()
-            conn.close()
+            # Stream pending blog posts and pages with content details from a
+            # server-side cursor while the template renders
+            items_cursor = conn.cursor(name='moderation_queue_items', cursor_factory=NamedTupleCursor)
+            items_cursor.itersize = 200
+            items_cursor.execute("""
+                SELECT mq.id as queue_id, mq.content_type, mq.content_id, mq.status,
+                       mq.created_at, mq.review_notes,
+                       COALESCE(bp.title, p.title) as title, bp.excerpt,
+                       COALESCE(bp.slug, p.slug) as slug,
+                       COALESCE(bp.is_published, p.is_published) as is_published,
+                       u.id as author_id, u.username, u.first_name, u.last_name, u.email,
+                       g.name as group_name
+                FROM moderation_queue mq
+                LEFT JOIN blog_posts bp ON mq.content_type = 'blog_post' AND mq.content_id = bp.id
+                LEFT JOIN pages p ON mq.content_type = 'page' AND mq.content_id = p.id
+                JOIN users u ON u.id = COALESCE(bp.author_id, p.author_id)
+                LEFT JOIN groups g ON g.id = COALESCE(bp.group_id, p.group_id)
+                WHERE mq.status = 'pending'
+                      AND (%s OR COALESCE(bp.group_id, p.group_id) = %s)
+                ORDER BY mq.created_at DESC
+            """, (user_role == 'SuperAdmin', group_id))
+
+            def stream_queue_items():
+                try:
+                    yield from items_cursor
+                finally:
+                    items_cursor.close()
+                    cursor.close()
+                    release_db_connection(conn)
 
-            return render_template('admin/moderation.html', queue_items=queue_items, stats=stats)
+            return stream_template('admin/moderation.html', queue_items=stream_queue_items(), stats=stats)
         else:
             flash('Database connection error', 'danger')
             return render_template('admin/moderation.html', queue_items=[], stats={})
@@ -1062,34 +1316,30 @@ def approve_moderation(queue_id):
                 flash('Moderation item not found', 'danger')
                 return redirect(url_for('admin.moderation_queue'))
 
-            # Update moderation queue
+            # Update moderation queue and publish the content in one statement
             cursor.execute("""
-                UPDATE moderation_queue
-                SET status = 'approved', reviewed_by = %s, reviewed_at = %s, review_notes = %s
-                WHERE id = %s
-            """, (session['user_id'], datetime.utcnow(), review_notes, queue_id))
-
-            # Publish the content
-            if item['content_type'] == 'blog_post':
-                cursor.execute("""
-                    UPDATE blog_posts SET is_published = TRUE, published_at = %s
+                WITH upd AS (
+                    UPDATE moderation_queue
+                    SET status = 'approved', reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP, review_notes = %s
                     WHERE id = %s
-                """, (datetime.utcnow(), item['content_id']))
-            elif item['content_type'] == 'page':
-                cursor.execute("""
-                    UPDATE pages SET is_published = TRUE, published_at = %s
-                    WHERE id = %s
-                """, (datetime.utcnow(), item['content_id']))
+                    RETURNING content_type, content_id
+                ), bp_upd AS (
+                    UPDATE blog_posts SET is_published = TRUE, published_at = CURRENT_TIMESTAMP
+                    WHERE id = (SELECT content_id FROM upd WHERE content_type = 'blog_post')
+                    RETURNING 1
+                )
+                UPDATE pages SET is_published = TRUE, published_at = CURRENT_TIMESTAMP
+                WHERE id = (SELECT content_id FROM upd WHERE content_type = 'page')
+            """, (session['user_id'], review_notes, queue_id))
 
             conn.commit()
+            cache_delete('analytics:')
 
             # Log activity
             log_user_activity(session['user_id'], 'approve_content', item['content_type'], item['content_id'])
 
             # Send notification email to author
             if item.get('email'):
-                from email_service import send_moderation_decision_email
-                from flask import current_app
                 send_moderation_decision_email(
                     item['email'],
                     f"{item['first_name']} {item['last_name']}",
@@ -1100,7 +1350,7 @@ def approve_moderation(queue_id):
                 )
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Content approved and published successfully', 'success')
             return redirect(url_for('admin.moderation_queue'))
@@ -1145,19 +1395,18 @@ def reject_moderation(queue_id):
             # Update moderation queue
             cursor.execute("""
                 UPDATE moderation_queue
-                SET status = 'rejected', reviewed_by = %s, reviewed_at = %s, review_notes = %s
+                SET status = 'rejected', reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP, review_notes = %s
                 WHERE id = %s
-            """, (session['user_id'], datetime.utcnow(), review_notes, queue_id))
+            """, (session['user_id'], review_notes, queue_id))
 
             conn.commit()
+            cache_delete('analytics:')
 
             # Log activity
             log_user_activity(session['user_id'], 'reject_content', item['content_type'], item['content_id'])
 
             # Send notification email to author
             if item.get('email'):
-                from email_service import send_moderation_decision_email
-                from flask import current_app
                 send_moderation_decision_email(
                     item['email'],
                     f"{item['first_name']} {item['last_name']}",
@@ -1168,7 +1417,7 @@ def reject_moderation(queue_id):
                 )
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Content rejected', 'success')
             return redirect(url_for('admin.moderation_queue'))
@@ -1201,52 +1450,48 @@ def bulk_moderation_action():
             flash('Please provide a reason for bulk rejection', 'warning')
             return redirect(url_for('admin.moderation_queue'))
 
+        try:
+            queue_ids = [int(queue_id) for queue_id in queue_ids]
+        except ValueError:
+            flash('Invalid items selected', 'danger')
+            return redirect(url_for('admin.moderation_queue'))
+
         conn = get_db_connection()
         if conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-            success_count = 0
-            for queue_id in queue_ids:
-                try:
-                    # Get queue item
-                    cursor.execute("""
-                        SELECT * FROM moderation_queue WHERE id = %s
-                    """, (queue_id,))
-                    item = cursor.fetchone()
-
-                    if not item:
-                        continue
+            status = 'approved' if action == 'approve' else 'rejected'
 
-                    # Update moderation queue
-                    status = 'approved' if action == 'approve' else 'rejected'
+            # Update all selected queue items in one statement
+            cursor.execute("""
+                UPDATE moderation_queue
+                SET status = %s, reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP, review_notes = %s
+                WHERE id = ANY(%s)
+                RETURNING content_type, content_id
+            """, (status, session['user_id'], review_notes, queue_ids))
+            items = cursor.fetchall()
+
+            # Publish content if approved
+            if action == 'approve':
+                blog_post_ids = [item['content_id'] for item in items if item['content_type'] == 'blog_post']
+                page_ids = [item['content_id'] for item in items if item['content_type'] == 'page']
+
+                if blog_post_ids:
+                    cursor.execute("""
+                        UPDATE blog_posts SET is_published = TRUE, published_at = CURRENT_TIMESTAMP
+                        WHERE id = ANY(%s)
+                    """, (blog_post_ids,))
+                if page_ids:
                     cursor.execute("""
-                        UPDATE moderation_queue
-                        SET status = %s, reviewed_by = %s, reviewed_at = %s, review_notes = %s
-                        WHERE id = %s
-                    """, (status, session['user_id'], datetime.utcnow(), review_notes, queue_id))
-
-                    # Publish content if approved
-                    if action == 'approve':
-                        if item['content_type'] == 'blog_post':
-                            cursor.execute("""
-                                UPDATE blog_posts SET is_published = TRUE, published_at = %s
-                                WHERE id = %s
-                            """, (datetime.utcnow(), item['content_id']))
-                        elif item['content_type'] == 'page':
-                            cursor.execute("""
-                                UPDATE pages SET is_published = TRUE, published_at = %s
-                                WHERE id = %s
-                            """, (datetime.utcnow(), item['content_id']))
-
-                    success_count += 1
-
-                except Exception as e:
-                    logger.error(f"Error processing queue item {queue_id}: {e}")
-                    continue
+                        UPDATE pages SET is_published = TRUE, published_at = CURRENT_TIMESTAMP
+                        WHERE id = ANY(%s)
+                    """, (page_ids,))
 
+            success_count = len(items)
             conn.commit()
+            cache_delete('analytics:')
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             # Log activity
             log_user_activity(session['user_id'], f'bulk_{action}_content', 'moderation', None,
@@ -1266,17 +1511,24 @@ def bulk_moderation_action():
 def api_settings():
     """API settings management (SuperAdmin only)"""
     try:
+        # Served from cache until the TTL expires or a setting is updated
+        settings = cache_get('api_settings')
+        if settings is not None:
+            return _render_conditional('admin/api_settings.html', settings=settings)
+
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor(cursor_factory=NamedTupleCursor)
             
             cursor.execute("SELECT * FROM api_settings ORDER BY setting_key")
             settings = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
+
+            cache_set('api_settings', settings, API_SETTINGS_CACHE_TIMEOUT)
             
-            return render_template('admin/api_settings.html', settings=settings)
+            return _render_conditional('admin/api_settings.html', settings=settings)
         else:
             flash('Database connection error', 'danger')
             return render_template('admin/api_settings.html', settings=[])
@@ -1291,9 +1543,12 @@ def api_settings():
 def update_api_settings():
     """Update API settings"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         setting_key = data.get('setting_key')
         setting_value = data.get('setting_value')
+
+        if not setting_key:
+            return jsonify({'success': False, 'message': 'Setting key is required'}), 400
         
         conn = get_db_connection()
         if conn:
@@ -1301,14 +1556,15 @@ def update_api_settings():
             
             cursor.execute("""
                 INSERT INTO api_settings (setting_key, setting_value, updated_at)
-                VALUES (%s, %s, %s)
+                VALUES (%s, %s, CURRENT_TIMESTAMP)
                 ON CONFLICT (setting_key) 
-                DO UPDATE SET setting_value = %s, updated_at = %s
-            """, (setting_key, setting_value, datetime.utcnow(), setting_value, datetime.utcnow()))
+                DO UPDATE SET setting_value = EXCLUDED.setting_value, updated_at = EXCLUDED.updated_at
+            """, (setting_key, setting_value))
             
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
+            cache_delete('api_settings')
             
             # Log activity
             log_user_activity(session['user_id'], 'update_api_settings', 'api_settings', None, {'key': setting_key})
@@ -1349,29 +1605,20 @@ def organization_settings():
                 contact_page_content = request.form.get('contact_page_content')
                 about_page_content = request.form.get('about_page_content')
 
-                # Convert theme_id to int or None
-                if theme_id and theme_id != '' and theme_id != '0':
-                    try:
-                        theme_id = int(theme_id)
-                    except ValueError:
-                        theme_id = None
-                else:
-                    theme_id = None
-
-                # Update organization settings
+                # Update organization settings; an empty, '0' or non-numeric
+                # theme_id clears the theme
                 cursor.execute("""
                     UPDATE groups
-                    SET theme_id = %s,
+                    SET theme_id = NULLIF(substring(%s from '^[0-9]+$')::int, 0),
                         contact_page_content = %s,
                         about_page_content = %s,
-                        updated_at = %s
+                        updated_at = CURRENT_TIMESTAMP
                     WHERE id = %s
-                """, (theme_id, contact_page_content, about_page_content,
-                      datetime.utcnow(), group_id))
+                """, (theme_id, contact_page_content, about_page_content, group_id))
 
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
 
                 # Log activity
                 log_user_activity(session['user_id'], 'update_organization_settings', 'group', group_id)
@@ -1389,47 +1636,28 @@ def organization_settings():
         if conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-            # Get organization details
-            cursor.execute("""
-                SELECT g.*, t.name as theme_name, u.username as admin_username, u.email as admin_email
-                FROM groups g
-                LEFT JOIN themes t ON g.theme_id = t.id
-                LEFT JOIN users u ON g.admin_user_id = u.id
-                WHERE g.id = %s
-            """, (group_id,))
+            # Get organization details, statistics and the themes available to
+            # the organization in one round-trip
+            cursor.execute("EXECUTE organization_settings(%s)", (group_id,))
             organization = cursor.fetchone()
 
             if not organization:
                 flash('Organization not found.', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('admin.dashboard'))
 
-            # Get themes available for this organization
-            cursor.execute("""
-                SELECT id, name, description, theme_type, created_at
-                FROM themes
-                WHERE group_id = %s AND is_active = TRUE
-                ORDER BY name
-            """, (group_id,))
-            themes = cursor.fetchall()
-
-            # Get organization statistics
-            cursor.execute("""
-                SELECT
-                    (SELECT COUNT(*) FROM users WHERE group_id = %s) as total_users,
-                    (SELECT COUNT(*) FROM blog_posts WHERE group_id = %s) as total_posts,
-                    (SELECT COUNT(*) FROM pages WHERE group_id = %s) as total_pages
-            """, (group_id, group_id, group_id))
-            stats = cursor.fetchone()
+            stats = {key: organization.pop(key)
+                     for key in ('total_users', 'total_posts', 'total_pages')}
+            themes = organization.pop('available_themes') or []
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
-            return render_template('admin/settings.html',
-                                 organization=organization,
-                                 themes=themes,
-                                 stats=stats)
+            return _render_conditional('admin/settings.html',
+                                       organization=organization,
+                                       themes=themes,
+                                       stats=stats)
         else:
             flash('Database connection error', 'danger')
             return redirect(url_for('admin.dashboard'))
@@ -1447,72 +1675,35 @@ def organization_settings():
 @role_required(['SuperAdmin', 'Admin'])
 def analytics():
     """Analytics dashboard with detailed metrics"""
-    try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            user_role = session['user_role']
-            group_id = session.get('group_id')
+    if _missing_group_scope():
+        flash('You must be assigned to an organization to view analytics.', 'danger')
+        return redirect(url_for('admin.dashboard'))
 
-            # ===== OVERVIEW STATS =====
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT
-                        (SELECT COUNT(*) FROM users WHERE is_active = TRUE) as total_users,
-                        (SELECT COUNT(*) FROM groups WHERE is_active = TRUE) as total_groups,
-                        (SELECT COUNT(*) FROM blog_posts WHERE is_published = TRUE) as total_blog_posts,
-                        (SELECT COUNT(*) FROM pages WHERE is_published = TRUE) as total_pages,
-                        (SELECT COUNT(*) FROM comments WHERE is_deleted = FALSE) as total_comments,
-                        (SELECT COALESCE(SUM(view_count), 0) FROM blog_posts) as total_blog_views,
-                        (SELECT COALESCE(SUM(view_count), 0) FROM pages) as total_page_views
-                """)
-            else:
-                cursor.execute("""
-                    SELECT
-                        (SELECT COUNT(*) FROM users WHERE group_id = %s AND is_active = TRUE) as total_users,
-                        (SELECT COUNT(*) FROM blog_posts WHERE group_id = %s AND is_published = TRUE) as total_blog_posts,
-                        (SELECT COUNT(*) FROM pages WHERE group_id = %s AND is_published = TRUE) as total_pages,
-                        (SELECT COUNT(*) FROM comments c
-                         JOIN blog_posts bp ON c.blog_post_id = bp.id
-                         WHERE bp.group_id = %s AND c.is_deleted = FALSE) as total_comments,
-                        (SELECT COALESCE(SUM(view_count), 0) FROM blog_posts WHERE group_id = %s) as total_blog_views,
-                        (SELECT COALESCE(SUM(view_count), 0) FROM pages WHERE group_id = %s) as total_page_views
-                """, (group_id, group_id, group_id, group_id, group_id, group_id))
-
-            overview_stats = cursor.fetchone()
-
-            # ===== POPULAR BLOG POSTS (Top 10) =====
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT bp.id, bp.title, bp.slug, bp.view_count, bp.created_at,
-                           u.username as author_username, u.first_name, u.last_name,
-                           g.name as group_name,
-                           (SELECT COUNT(*) FROM comments WHERE blog_post_id = bp.id AND is_deleted = FALSE) as comment_count
-                    FROM blog_posts bp
-                    JOIN users u ON bp.author_id = u.id
-                    LEFT JOIN groups g ON bp.group_id = g.id
-                    WHERE bp.is_published = TRUE
-                    ORDER BY bp.view_count DESC
-                    LIMIT 10
-                """)
-            else:
-                cursor.execute("""
-                    SELECT bp.id, bp.title, bp.slug, bp.view_count, bp.created_at,
-                           u.username as author_username, u.first_name, u.last_name,
-                           (SELECT COUNT(*) FROM comments WHERE blog_post_id = bp.id AND is_deleted = FALSE) as comment_count
-                    FROM blog_posts bp
-                    JOIN users u ON bp.author_id = u.id
-                    WHERE bp.group_id = %s AND bp.is_published = TRUE
-                    ORDER BY bp.view_count DESC
+    try:
+        user_role = session['user_role']
+        group_id = session.get('group_id')
+
+        # The dashboard sections are independent, so each runs on its own
+        # pooled connection and the page waits for the slowest one only.
+        # Overview totals, popular posts and tag stats come from materialized
+        # views refreshed by `init_db.py --refresh-analytics`.
+        if user_role == 'SuperAdmin':
+            overview_query = ("""
+                SELECT total_users, total_groups, total_blog_posts, total_pages,
+                       total_comments, total_blog_views, total_page_views
+                FROM analytics_overview
+            """, None)
+            queries = {
+                # ===== POPULAR BLOG POSTS (Top 10) =====
+                'popular_posts': ("""
+                    SELECT id, title, slug, view_count, created_at,
+                           author_username, first_name, last_name, group_name, comment_count
+                    FROM mv_popular_posts_by_group
+                    ORDER BY view_count DESC
                     LIMIT 10
-                """, (group_id,))
-
-            popular_posts = cursor.fetchall()
-
-            # ===== POPULAR PAGES (Top 10) =====
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
+                """, None),
+                # ===== POPULAR PAGES (Top 10) =====
+                'popular_pages': ("""
                     SELECT p.id, p.title, p.slug, p.view_count, p.created_at,
                            u.username as author_username, u.first_name, u.last_name,
                            g.name as group_name
@@ -1522,9 +1713,84 @@ def analytics():
                     WHERE p.is_published = TRUE
                     ORDER BY p.view_count DESC
                     LIMIT 10
-                """)
-            else:
-                cursor.execute("""
+                """, None),
+                # ===== RECENT ACTIVITY (Last 30 days) =====
+                'activity_timeline': ("""
+                    SELECT
+                        day as date,
+                        COALESCE(SUM(n) FILTER (WHERE action = 'create_blog_post'), 0) as new_posts,
+                        COALESCE(SUM(n) FILTER (WHERE action = 'create_page'), 0) as new_pages,
+                        COALESCE(SUM(n) FILTER (WHERE action = 'register'), 0) as new_users
+                    FROM daily_activity_stats
+                    WHERE day >= CURRENT_DATE - 30
+                    GROUP BY day
+                    ORDER BY day DESC
+                    LIMIT 30
+                """, None),
+                # ===== USER ENGAGEMENT =====
+                'top_contributors': ("""
+                    WITH post_agg AS (
+                        SELECT author_id, COUNT(*) as post_count,
+                               COALESCE(SUM(view_count), 0) as total_views
+                        FROM blog_posts
+                        GROUP BY author_id
+                    ), comment_agg AS (
+                        SELECT user_id, COUNT(*) as comment_count
+                        FROM comments
+                        WHERE is_deleted = FALSE
+                        GROUP BY user_id
+                    )
+                    SELECT u.id, u.username, u.first_name, u.last_name,
+                           COALESCE(pa.post_count, 0) as post_count,
+                           COALESCE(ca.comment_count, 0) as comment_count,
+                           COALESCE(pa.total_views, 0) as total_views
+                    FROM users u
+                    LEFT JOIN post_agg pa ON pa.author_id = u.id
+                    LEFT JOIN comment_agg ca ON ca.user_id = u.id
+                    WHERE u.is_active = TRUE
+                    ORDER BY total_views DESC
+                    LIMIT 10
+                """, None),
+                # ===== CONTENT PERFORMANCE BY TAG =====
+                'tag_stats': ("""
+                    SELECT tag,
+                           SUM(post_count) as post_count,
+                           SUM(total_views)::numeric / SUM(post_count) as avg_views
+                    FROM mv_tag_stats
+                    GROUP BY tag
+                    ORDER BY post_count DESC
+                    LIMIT 15
+                """, None),
+                # ===== COMMENT ENGAGEMENT =====
+                'most_commented': ("""
+                    SELECT bp.id, bp.title, bp.slug, bp.comment_count, bp.view_count,
+                           u.username as author_username
+                    FROM blog_posts bp
+                    JOIN users u ON bp.author_id = u.id
+                    WHERE bp.is_published = TRUE
+                    ORDER BY bp.comment_count DESC
+                    LIMIT 10
+                """, None),
+            }
+        else:
+            overview_query = ("""
+                SELECT total_users, total_blog_posts, total_pages, total_comments,
+                       total_blog_views, total_page_views
+                FROM mv_group_overview_stats
+                WHERE group_id = %s
+            """, (group_id,))
+            queries = {
+                # ===== POPULAR BLOG POSTS (Top 10) =====
+                'popular_posts': ("""
+                    SELECT id, title, slug, view_count, created_at,
+                           author_username, first_name, last_name, comment_count
+                    FROM mv_popular_posts_by_group
+                    WHERE group_id = %s
+                    ORDER BY view_count DESC
+                    LIMIT 10
+                """, (group_id,)),
+                # ===== POPULAR PAGES (Top 10) =====
+                'popular_pages': ("""
                     SELECT p.id, p.title, p.slug, p.view_count, p.created_at,
                            u.username as author_username, u.first_name, u.last_name
                     FROM pages p
@@ -1532,142 +1798,109 @@ def analytics():
                     WHERE p.group_id = %s AND p.is_published = TRUE
                     ORDER BY p.view_count DESC
                     LIMIT 10
-                """, (group_id,))
-
-            popular_pages = cursor.fetchall()
-
-            # ===== RECENT ACTIVITY (Last 30 days) =====
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT
-                        DATE(created_at) as date,
-                        COUNT(*) FILTER (WHERE action = 'create_blog_post') as new_posts,
-                        COUNT(*) FILTER (WHERE action = 'create_page') as new_pages,
-                        COUNT(*) FILTER (WHERE action = 'register') as new_users
-                    FROM user_activity_logs
-                    WHERE created_at >= CURRENT_DATE - INTERVAL '30 days'
-                    GROUP BY DATE(created_at)
-                    ORDER BY date DESC
-                    LIMIT 30
-                """)
-            else:
-                cursor.execute("""
+                """, (group_id,)),
+                # ===== RECENT ACTIVITY (Last 30 days) =====
+                'activity_timeline': ("""
                     SELECT
-                        DATE(ual.created_at) as date,
-                        COUNT(*) FILTER (WHERE ual.action = 'create_blog_post') as new_posts,
-                        COUNT(*) FILTER (WHERE ual.action = 'create_page') as new_pages,
-                        COUNT(*) FILTER (WHERE ual.action = 'register') as new_users
-                    FROM user_activity_logs ual
-                    JOIN users u ON ual.user_id = u.id
-                    WHERE u.group_id = %s AND ual.created_at >= CURRENT_DATE - INTERVAL '30 days'
-                    GROUP BY DATE(ual.created_at)
-                    ORDER BY date DESC
+                        day as date,
+                        COALESCE(SUM(n) FILTER (WHERE action = 'create_blog_post'), 0) as new_posts,
+                        COALESCE(SUM(n) FILTER (WHERE action = 'create_page'), 0) as new_pages,
+                        COALESCE(SUM(n) FILTER (WHERE action = 'register'), 0) as new_users
+                    FROM daily_activity_stats
+                    WHERE group_id = %s AND day >= CURRENT_DATE - 30
+                    GROUP BY day
+                    ORDER BY day DESC
                     LIMIT 30
-                """, (group_id,))
-
-            activity_timeline = cursor.fetchall()
-
-            # ===== USER ENGAGEMENT =====
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
+                """, (group_id,)),
+                # ===== USER ENGAGEMENT =====
+                'top_contributors': ("""
+                    WITH post_agg AS (
+                        SELECT author_id, COUNT(*) as post_count,
+                               COALESCE(SUM(view_count), 0) as total_views
+                        FROM blog_posts
+                        WHERE author_id IN (SELECT id FROM users WHERE group_id = %s)
+                        GROUP BY author_id
+                    ), comment_agg AS (
+                        SELECT user_id, COUNT(*) as comment_count
+                        FROM comments
+                        WHERE is_deleted = FALSE
+                          AND user_id IN (SELECT id FROM users WHERE group_id = %s)
+                        GROUP BY user_id
+                    )
                     SELECT u.id, u.username, u.first_name, u.last_name,
-                           (SELECT COUNT(*) FROM blog_posts WHERE author_id = u.id) as post_count,
-                           (SELECT COUNT(*) FROM comments WHERE user_id = u.id AND is_deleted = FALSE) as comment_count,
-                           (SELECT COALESCE(SUM(view_count), 0) FROM blog_posts WHERE author_id = u.id) as total_views
-                    FROM users u
-                    WHERE u.is_active = TRUE
-                    ORDER BY total_views DESC
-                    LIMIT 10
-                """)
-            else:
-                cursor.execute("""
-                    SELECT u.id, u.username, u.first_name, u.last_name,
-                           (SELECT COUNT(*) FROM blog_posts WHERE author_id = u.id) as post_count,
-                           (SELECT COUNT(*) FROM comments WHERE user_id = u.id AND is_deleted = FALSE) as comment_count,
-                           (SELECT COALESCE(SUM(view_count), 0) FROM blog_posts WHERE author_id = u.id) as total_views
+                           COALESCE(pa.post_count, 0) as post_count,
+                           COALESCE(ca.comment_count, 0) as comment_count,
+                           COALESCE(pa.total_views, 0) as total_views
                     FROM users u
+                    LEFT JOIN post_agg pa ON pa.author_id = u.id
+                    LEFT JOIN comment_agg ca ON ca.user_id = u.id
                     WHERE u.group_id = %s AND u.is_active = TRUE
                     ORDER BY total_views DESC
                     LIMIT 10
-                """, (group_id,))
-
-            top_contributors = cursor.fetchall()
-
-            # ===== CONTENT PERFORMANCE BY TAG =====
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT
-                        unnest(tags) as tag,
-                        COUNT(*) as post_count,
-                        AVG(view_count) as avg_views
-                    FROM blog_posts
-                    WHERE is_published = TRUE AND tags IS NOT NULL AND array_length(tags, 1) > 0
-                    GROUP BY tag
+                """, (group_id, group_id, group_id)),
+                # ===== CONTENT PERFORMANCE BY TAG =====
+                'tag_stats': ("""
+                    SELECT tag, post_count, avg_views
+                    FROM mv_tag_stats
+                    WHERE group_id = %s
                     ORDER BY post_count DESC
                     LIMIT 15
-                """)
-            else:
-                cursor.execute("""
-                    SELECT
-                        unnest(tags) as tag,
-                        COUNT(*) as post_count,
-                        AVG(view_count) as avg_views
-                    FROM blog_posts
-                    WHERE group_id = %s AND is_published = TRUE AND tags IS NOT NULL AND array_length(tags, 1) > 0
-                    GROUP BY tag
-                    ORDER BY post_count DESC
-                    LIMIT 15
-                """, (group_id,))
-
-            tag_stats = cursor.fetchall()
-
-            # ===== COMMENT ENGAGEMENT =====
-            if user_role == 'SuperAdmin':
-                cursor.execute("""
-                    SELECT bp.id, bp.title, bp.slug,
-                           COUNT(c.id) as comment_count,
-                           bp.view_count,
-                           u.username as author_username
-                    FROM blog_posts bp
-                    JOIN users u ON bp.author_id = u.id
-                    LEFT JOIN comments c ON bp.id = c.blog_post_id AND c.is_deleted = FALSE
-                    WHERE bp.is_published = TRUE
-                    GROUP BY bp.id, bp.title, bp.slug, bp.view_count, u.username
-                    ORDER BY comment_count DESC
-                    LIMIT 10
-                """)
-            else:
-                cursor.execute("""
-                    SELECT bp.id, bp.title, bp.slug,
-                           COUNT(c.id) as comment_count,
-                           bp.view_count,
+                """, (group_id,)),
+                # ===== COMMENT ENGAGEMENT =====
+                'most_commented': ("""
+                    SELECT bp.id, bp.title, bp.slug, bp.comment_count, bp.view_count,
                            u.username as author_username
                     FROM blog_posts bp
                     JOIN users u ON bp.author_id = u.id
-                    LEFT JOIN comments c ON bp.id = c.blog_post_id AND c.is_deleted = FALSE
                     WHERE bp.group_id = %s AND bp.is_published = TRUE
-                    GROUP BY bp.id, bp.title, bp.slug, bp.view_count, u.username
-                    ORDER BY comment_count DESC
+                    ORDER BY bp.comment_count DESC
                     LIMIT 10
-                """, (group_id,))
-
-            most_commented = cursor.fetchall()
-
-            cursor.close()
-            conn.close()
-
-            return render_template('admin/analytics.html',
-                                 overview_stats=overview_stats,
-                                 popular_posts=popular_posts,
-                                 popular_pages=popular_pages,
-                                 activity_timeline=activity_timeline,
-                                 top_contributors=top_contributors,
-                                 tag_stats=tag_stats,
-                                 most_commented=most_commented,
-                                 user_role=user_role)
+                """, (group_id,)),
+            }
+
+        # The whole dashboard is cached per role/group and dropped on moderation writes
+        cache_key = f"analytics:{user_role}:{group_id}"
+        cached = cache_get(cache_key)
+        # One cheap look at the write counters tells whether the cached copy is stale
+        source_versions = _analytics_source_versions()
+        if cached is not None and cached['source_versions'] != source_versions:
+            cached = None
+        if cached is None:
+            generated_at = datetime.utcnow().isoformat()
+            # A group created since the last view refresh has no overview row yet
+            sections = {name: _SectionRows(*query) for name, query in queries.items()}
+            sections['overview_stats'] = _SectionRows(*overview_query, single=True)
         else:
-            flash('Database connection error', 'danger')
-            return render_template('admin/analytics.html')
+            generated_at = cached['generated_at']
+            sections = {}
+            for name, rows in cached['sections'].items():
+                sections[name] = Future()
+                sections[name].set_result(rows)
+
+        # The ETag names one cached generation of the dashboard, so a reload
+        # within its lifetime is answered with 304 and no body
+        etag = hashlib.sha1(f"{session.get('user_id')}|{cache_key}|{generated_at}".encode()).hexdigest()
+        if cached is not None and '_flashes' not in session and request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            # Stream the page so the layout goes out while the queries run; each
+            # section is written as soon as its rows are in
+            def stream_dashboard():
+                yield from stream_template('admin/analytics.html',
+                                           user_role=user_role,
+                                           sections=sections)
+                if cached is None:
+                    cache_set(cache_key, {
+                        'generated_at': generated_at,
+                        'source_versions': source_versions,
+                        'sections': {name: section.result() for name, section in sections.items()},
+                    }, ANALYTICS_CACHE_TIMEOUT)
+
+            response = make_response(stream_with_context(stream_dashboard()))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Cookie')
+        return response
 
     except Exception as e:
         flash('Error loading analytics', 'danger')
@@ -1682,6 +1915,10 @@ def analytics():
 @role_required(['SuperAdmin', 'Admin'])
 def manage_comments():
     """View and manage comments"""
+    if _missing_group_scope():
+        flash('You must be assigned to an organization to manage comments.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
     try:
         conn = get_db_connection()
         if conn:
@@ -1690,10 +1927,17 @@ def manage_comments():
             user_role = session['user_role']
             group_id = session.get('group_id')
 
+            # Keyset cursor for paging back through comments (?after=<iso>&after_id=<id>)
+            after = _parse_after(request.args.get('after'))
+            after_id = request.args.get('after_id', type=int)
+            if after_id is None:
+                after = None
+
             # Build query based on role
             if user_role == 'SuperAdmin':
                 cursor.execute("""
-                    SELECT c.*, u.username, u.first_name, u.last_name,
+                    SELECT c.id, c.parent_id, c.content, c.is_approved, c.created_at,
+                           u.username, u.first_name, u.last_name,
                            bp.title as post_title, bp.slug as post_slug,
                            g.name as group_name
                     FROM comments c
@@ -1701,12 +1945,14 @@ def manage_comments():
                     JOIN blog_posts bp ON c.blog_post_id = bp.id
                     LEFT JOIN groups g ON bp.group_id = g.id
                     WHERE c.is_deleted = FALSE
-                    ORDER BY c.created_at DESC
-                    LIMIT 100
-                """)
+                          AND (%s::timestamp IS NULL OR (c.created_at, c.id) < (%s, %s))
+                    ORDER BY c.created_at DESC, c.id DESC
+                    LIMIT %s
+                """, (after, after, after_id, COMMENTS_PER_PAGE))
             else:
                 cursor.execute("""
-                    SELECT c.*, u.username, u.first_name, u.last_name,
+                    SELECT c.id, c.parent_id, c.content, c.is_approved, c.created_at,
+                           u.username, u.first_name, u.last_name,
                            bp.title as post_title, bp.slug as post_slug,
                            g.name as group_name
                     FROM comments c
@@ -1714,9 +1960,10 @@ def manage_comments():
                     JOIN blog_posts bp ON c.blog_post_id = bp.id
                     LEFT JOIN groups g ON bp.group_id = g.id
                     WHERE c.is_deleted = FALSE AND bp.group_id = %s
-                    ORDER BY c.created_at DESC
-                    LIMIT 100
-                """, (group_id,))
+                          AND (%s::timestamp IS NULL OR (c.created_at, c.id) < (%s, %s))
+                    ORDER BY c.created_at DESC, c.id DESC
+                    LIMIT %s
+                """, (group_id, after, after, after_id, COMMENTS_PER_PAGE))
 
             comments = cursor.fetchall()
 
@@ -1743,9 +1990,10 @@ def manage_comments():
             stats = cursor.fetchone()
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
-            return render_template('admin/comments.html', comments=comments, stats=stats)
+            return render_template('admin/comments.html', comments=comments, stats=stats,
+                                 per_page=COMMENTS_PER_PAGE)
         else:
             flash('Database connection error', 'danger')
             return render_template('admin/comments.html', comments=[], stats={})
@@ -1756,47 +2004,97 @@ def manage_comments():
         return render_template('admin/comments.html', comments=[], stats={})
 
 
+@bp.route('/comments/export.csv')
+@login_required
+@role_required(['SuperAdmin', 'Admin'])
+def export_comments():
+    """Stream the full comment history as CSV"""
+    if _missing_group_scope():
+        flash('You must be assigned to an organization to export comments.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    try:
+        conn = get_db_connection()
+        if not conn:
+            flash('Database connection error', 'danger')
+            return redirect(url_for('admin.manage_comments'))
+
+        user_role = session['user_role']
+        group_id = session.get('group_id')
+
+        # Server-side cursor so the export never holds the full history in memory
+        export_cursor = conn.cursor(name='comments_export', cursor_factory=RealDictCursor)
+        export_cursor.itersize = COMMENTS_EXPORT_BATCH_SIZE
+        export_cursor.execute("""
+            SELECT c.id, c.blog_post_id, c.parent_id, c.content, c.is_approved,
+                   c.is_deleted, c.created_at, u.username,
+                   bp.title as post_title, g.name as group_name
+            FROM comments c
+            JOIN users u ON c.user_id = u.id
+            JOIN blog_posts bp ON c.blog_post_id = bp.id
+            LEFT JOIN groups g ON bp.group_id = g.id
+            WHERE (%s OR bp.group_id = %s)
+            ORDER BY c.created_at DESC, c.id DESC
+        """, (user_role == 'SuperAdmin', group_id))
+    except Exception as e:
+        flash('Error exporting comments', 'danger')
+        logger.error(f"Error exporting comments: {e}")
+        return redirect(url_for('admin.manage_comments'))
+
+    columns = ['id', 'blog_post_id', 'parent_id', 'content', 'is_approved',
+               'is_deleted', 'created_at', 'username', 'post_title', 'group_name']
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        try:
+            writer.writeheader()
+            for batch in iter(lambda: export_cursor.fetchmany(COMMENTS_EXPORT_BATCH_SIZE), []):
+                writer.writerows(batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            export_cursor.close()
+            release_db_connection(conn)
+
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=comments.csv'})
+
+
 @bp.route('/comments/<int:comment_id>/approve', methods=['POST'])
 @login_required
 @role_required(['SuperAdmin', 'Admin'])
 def approve_comment(comment_id):
     """Approve a comment"""
+    if _missing_group_scope():
+        flash('You must be assigned to an organization to moderate comments.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
     try:
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor()
 
-            # Verify permission
-            cursor.execute("""
-                SELECT c.*, bp.group_id FROM comments c
-                JOIN blog_posts bp ON c.blog_post_id = bp.id
-                WHERE c.id = %s
-            """, (comment_id,))
-            comment = cursor.fetchone()
-
-            if not comment:
-                flash('Comment not found', 'danger')
-                cursor.close()
-                conn.close()
-                return redirect(url_for('admin.manage_comments'))
+            # Update only if the comment exists and Admins only within their own group
+            cursor.execute("EXECUTE set_comment_approval(%s, TRUE, %s, %s)",
+                           (comment_id, session['user_role'], session.get('group_id')))
 
-            # Check group permission for Admin
-            if session['user_role'] == 'Admin' and comment['group_id'] != session.get('group_id'):
-                flash('You do not have permission to moderate this comment', 'danger')
+            if not cursor.fetchone():
+                flash('Comment not found or you do not have permission to moderate it', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('admin.manage_comments'))
 
-            cursor.execute("""
-                UPDATE comments SET is_approved = TRUE, updated_at = %s
-                WHERE id = %s
-            """, (datetime.utcnow(), comment_id))
             conn.commit()
+            cache_delete('analytics:')
 
             log_user_activity(session['user_id'], 'approve_comment', 'comment', comment_id)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Comment approved successfully', 'success')
             return redirect(url_for('admin.manage_comments'))
@@ -1815,42 +2113,32 @@ def approve_comment(comment_id):
 @role_required(['SuperAdmin', 'Admin'])
 def unapprove_comment(comment_id):
     """Unapprove/hide a comment"""
+    if _missing_group_scope():
+        flash('You must be assigned to an organization to moderate comments.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
     try:
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor()
 
-            # Verify permission
-            cursor.execute("""
-                SELECT c.*, bp.group_id FROM comments c
-                JOIN blog_posts bp ON c.blog_post_id = bp.id
-                WHERE c.id = %s
-            """, (comment_id,))
-            comment = cursor.fetchone()
-
-            if not comment:
-                flash('Comment not found', 'danger')
-                cursor.close()
-                conn.close()
-                return redirect(url_for('admin.manage_comments'))
+            # Update only if the comment exists and Admins only within their own group
+            cursor.execute("EXECUTE set_comment_approval(%s, FALSE, %s, %s)",
+                           (comment_id, session['user_role'], session.get('group_id')))
 
-            # Check group permission for Admin
-            if session['user_role'] == 'Admin' and comment['group_id'] != session.get('group_id'):
-                flash('You do not have permission to moderate this comment', 'danger')
+            if not cursor.fetchone():
+                flash('Comment not found or you do not have permission to moderate it', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('admin.manage_comments'))
 
-            cursor.execute("""
-                UPDATE comments SET is_approved = FALSE, updated_at = %s
-                WHERE id = %s
-            """, (datetime.utcnow(), comment_id))
             conn.commit()
+            cache_delete('analytics:')
 
             log_user_activity(session['user_id'], 'unapprove_comment', 'comment', comment_id)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Comment hidden successfully', 'success')
             return redirect(url_for('admin.manage_comments'))
@@ -1869,42 +2157,32 @@ def unapprove_comment(comment_id):
 @role_required(['SuperAdmin', 'Admin'])
 def admin_delete_comment(comment_id):
     """Delete a comment (soft delete)"""
+    if _missing_group_scope():
+        flash('You must be assigned to an organization to moderate comments.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
     try:
         conn = get_db_connection()
         if conn:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor()
 
-            # Verify permission
-            cursor.execute("""
-                SELECT c.*, bp.group_id FROM comments c
-                JOIN blog_posts bp ON c.blog_post_id = bp.id
-                WHERE c.id = %s
-            """, (comment_id,))
-            comment = cursor.fetchone()
-
-            if not comment:
-                flash('Comment not found', 'danger')
-                cursor.close()
-                conn.close()
-                return redirect(url_for('admin.manage_comments'))
+            # Update only if the comment exists and Admins only within their own group
+            cursor.execute("EXECUTE soft_delete_comment(%s, %s, %s)",
+                           (comment_id, session['user_role'], session.get('group_id')))
 
-            # Check group permission for Admin
-            if session['user_role'] == 'Admin' and comment['group_id'] != session.get('group_id'):
-                flash('You do not have permission to delete this comment', 'danger')
+            if not cursor.fetchone():
+                flash('Comment not found or you do not have permission to delete it', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('admin.manage_comments'))
 
-            cursor.execute("""
-                UPDATE comments SET is_deleted = TRUE, updated_at = %s
-                WHERE id = %s
-            """, (datetime.utcnow(), comment_id))
             conn.commit()
+            cache_delete('analytics:')
 
             log_user_activity(session['user_id'], 'admin_delete_comment', 'comment', comment_id)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Comment deleted successfully', 'success')
             return redirect(url_for('admin.manage_comments'))
@@ -3,21 +3,48 @@ API routes for Opinian platform
 RESTful API endpoints for frontend integration
 """
 
+import base64
+import binascii
+import json
 import jwt
 import logging
+import re
+import time
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import Blueprint, request, jsonify, session, current_app
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import check_password_hash
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from app import get_db_connection, log_user_activity
+from app import get_db_connection, release_db_connection, log_user_activity, cache_get, cache_set, record_view, hash_password
 from ai_service import ai_service
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
+SYSTEM_SETTINGS_CACHE_TIMEOUT = 30
+
+# Runs of characters that can't appear in a post slug
+_SLUG_RE = re.compile(r'[^a-zA-Z0-9-]+')
+
+# Must match the expression of idx_blog_posts_search in init_db.py for the
+# full-text search to use the GIN index
+POST_SEARCH_VECTOR = "to_tsvector('english', coalesce(bp.title, '') || ' ' || coalesce(bp.content, ''))"
+
+def _encode_post_cursor(post):
+    """Opaque keyset cursor pointing just past a blog post in the feed order"""
+    payload = json.dumps({'published_at': post['published_at'].isoformat(), 'id': post['id']})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_post_cursor(token):
+    """Return (published_at, id) from a cursor, or None if it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return datetime.fromisoformat(payload['published_at']), int(payload['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
 def token_required(f):
     """Decorator to require JWT token for API endpoints"""
     @wraps(f)
@@ -32,8 +59,14 @@ def token_required(f):
             if token.startswith('Bearer '):
                 token = token[7:]
             
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user_id = data['user_id']
+            # Tokens already verified by this worker are trusted until they expire
+            current_user_id = cache_get(f"jwt:{token}")
+            if current_user_id is None:
+                # One verified decode; tokens without an expiry or user are rejected
+                data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'],
+                                  options={'require': ['exp', 'user_id']})
+                current_user_id = data['user_id']
+                cache_set(f"jwt:{token}", current_user_id, data['exp'] - time.time())
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token has expired'}), 401
         except jwt.InvalidTokenError:
@@ -66,7 +99,7 @@ def api_login():
             
             user = cursor.fetchone()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             if user and check_password_hash(user['password_hash'], password):
                 if user['is_banned']:
@@ -122,29 +155,23 @@ def api_register():
         if conn:
             cursor = conn.cursor()
             
-            # Check if user exists
-            cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s", 
-                         (username, email))
-            if cursor.fetchone():
-                return jsonify({'message': 'Username or email already exists'}), 409
-            
-            # Get default user role
-            cursor.execute("SELECT id FROM roles WHERE name = 'User'")
-            role_result = cursor.fetchone()
-            default_role_id = role_result[0] if role_result else None
-            
-            # Create user
-            password_hash = generate_password_hash(password)
+            # Create user with the default role; the username/email unique
+            # constraints turn a taken name into no row instead of a race
+            password_hash = hash_password(password)
             cursor.execute("""
                 INSERT INTO users (username, email, password_hash, first_name, last_name, role_id)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, (SELECT id FROM roles WHERE name = 'User'))
+                ON CONFLICT DO NOTHING
                 RETURNING id
-            """, (username, email, password_hash, first_name, last_name, default_role_id))
+            """, (username, email, password_hash, first_name, last_name))
             
-            user_id = cursor.fetchone()[0]
+            result = cursor.fetchone()
+            if not result:
+                return jsonify({'message': 'Username or email already exists'}), 409
+            user_id = result[0]
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             # Log registration
             log_user_activity(user_id, 'api_register')
@@ -161,65 +188,102 @@ def api_register():
 
 @bp.route('/blog/posts', methods=['GET'])
 def get_blog_posts():
-    """Get blog posts with pagination and filtering"""
+    """Get blog posts with pagination and filtering
+
+    Pass the returned next_cursor back as ?cursor= to seek straight to the
+    next page; page= is kept for shallow OFFSET paging and the total count.
+    """
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         group_id = request.args.get('group_id', type=int)
         search = request.args.get('search', '')
-        
+        cursor_token = request.args.get('cursor')
+
+        after = None
+        if cursor_token:
+            after = _decode_post_cursor(cursor_token)
+            if after is None:
+                return jsonify({'message': 'Invalid cursor'}), 400
+
         offset = (page - 1) * per_page
         
         conn = get_db_connection()
         if conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             
-            # Build query
-            query = """
-                SELECT bp.*, u.username, u.first_name, u.last_name, g.name as group_name
+            # Build query; list rows leave out the post body (fetch a single post
+            # for content), and page requests carry the filtered total on every
+            # row so it doesn't need a second COUNT(*) query
+            total_column = "" if after else ", COUNT(*) OVER () as total_count"
+            query = f"""
+                SELECT bp.id, bp.title, bp.slug, bp.excerpt, bp.featured_image_url,
+                       bp.author_id, bp.group_id, bp.tags, bp.is_published,
+                       bp.view_count, bp.comment_count,
+                       bp.published_at, bp.created_at, bp.updated_at,
+                       u.username, u.first_name, u.last_name, g.name as group_name{total_column}
                 FROM blog_posts bp
                 JOIN users u ON bp.author_id = u.id
                 JOIN groups g ON bp.group_id = g.id
                 WHERE bp.is_published = TRUE AND g.is_active = TRUE
             """
-            params = []
+            filters = ""
+            filter_params = []
             
             if group_id:
-                query += " AND bp.group_id = %s"
-                params.append(group_id)
+                filters += " AND bp.group_id = %s"
+                filter_params.append(group_id)
             
             if search:
-                query += " AND (bp.title ILIKE %s OR bp.content ILIKE %s)"
-                params.extend([f'%{search}%', f'%{search}%'])
+                filters += f" AND {POST_SEARCH_VECTOR} @@ plainto_tsquery('english', %s)"
+                filter_params.append(search)
+            
+            query += filters
+            params = list(filter_params)
             
-            query += " ORDER BY bp.published_at DESC LIMIT %s OFFSET %s"
-            params.extend([per_page, offset])
+            if after:
+                query += " AND (bp.published_at, bp.id) < (%s, %s)"
+                params.extend(after)
+
+            # One extra row tells us whether there is a next page
+            query += " ORDER BY bp.published_at DESC, bp.id DESC LIMIT %s OFFSET %s"
+            params.extend([per_page + 1, 0 if after else offset])
             
             cursor.execute(query, params)
             posts = cursor.fetchall()
-            
-            # Get total count
-            count_query = """
-                SELECT COUNT(*) 
-                FROM blog_posts bp
-                JOIN groups g ON bp.group_id = g.id
-                WHERE bp.is_published = TRUE AND g.is_active = TRUE
-            """
-            count_params = []
-            
-            if group_id:
-                count_query += " AND bp.group_id = %s"
-                count_params.append(group_id)
-            
-            if search:
-                count_query += " AND (bp.title ILIKE %s OR bp.content ILIKE %s)"
-                count_params.extend([f'%{search}%', f'%{search}%'])
-            
-            cursor.execute(count_query, count_params)
-            total = cursor.fetchone()['count']
-            
+            total = posts[0].get('total_count', 0) if posts else 0
+            if not posts and not after and offset > 0:
+                # Past the last page there is no row to carry the total
+                cursor.execute(f"""
+                    SELECT COUNT(*) as total_count
+                    FROM blog_posts bp
+                    JOIN users u ON bp.author_id = u.id
+                    JOIN groups g ON bp.group_id = g.id
+                    WHERE bp.is_published = TRUE AND g.is_active = TRUE{filters}
+                """, filter_params)
+                total = cursor.fetchone()['total_count']
+            for post in posts:
+                post.pop('total_count', None)
+            has_more = len(posts) > per_page
+            posts = posts[:per_page]
+            next_cursor = None
+            if has_more and posts[-1]['published_at']:
+                next_cursor = _encode_post_cursor(posts[-1])
+
+            if after:
+                cursor.close()
+                release_db_connection(conn)
+                return jsonify({
+                    'posts': posts,
+                    'pagination': {
+                        'per_page': per_page,
+                        'has_more': has_more,
+                        'next_cursor': next_cursor
+                    }
+                })
+
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return jsonify({
                 'posts': posts,
@@ -227,7 +291,9 @@ def get_blog_posts():
                     'page': page,
                     'per_page': per_page,
                     'total': total,
-                    'pages': (total + per_page - 1) // per_page
+                    'pages': (total + per_page - 1) // per_page,
+                    'has_more': has_more,
+                    'next_cursor': next_cursor
                 }
             })
         else:
@@ -245,7 +311,11 @@ def get_blog_post(post_id):
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             
             cursor.execute("""
-                SELECT bp.*, u.username, u.first_name, u.last_name, g.name as group_name
+                SELECT bp.id, bp.title, bp.slug, bp.content, bp.excerpt, bp.featured_image_url,
+                       bp.author_id, bp.group_id, bp.page_id, bp.tags, bp.is_published,
+                       bp.meta_description, bp.meta_keywords, bp.view_count, bp.comment_count,
+                       bp.published_at, bp.created_at, bp.updated_at,
+                       u.username, u.first_name, u.last_name, g.name as group_name
                 FROM blog_posts bp
                 JOIN users u ON bp.author_id = u.id
                 JOIN groups g ON bp.group_id = g.id
@@ -257,12 +327,10 @@ def get_blog_post(post_id):
             if not post:
                 return jsonify({'message': 'Post not found'}), 404
             
-            # Increment view count
-            cursor.execute("UPDATE blog_posts SET view_count = view_count + 1 WHERE id = %s", (post_id,))
-            conn.commit()
+            record_view('blog_posts', post_id)
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return jsonify(post)
         else:
@@ -291,33 +359,30 @@ def create_blog_post(current_user_id):
             cursor = conn.cursor()
             
             # Generate slug
-            import re
-            slug = re.sub(r'[^a-zA-Z0-9-]+', '-', title.lower()).strip('-')
-            
-            # Ensure unique slug
-            cursor.execute("SELECT id FROM blog_posts WHERE slug = %s", (slug,))
-            if cursor.fetchone():
-                slug = f"{slug}-{int(datetime.now().timestamp())}"
-            
-            # Get user group
-            cursor.execute("SELECT group_id FROM users WHERE id = %s", (current_user_id,))
-            group_id = cursor.fetchone()[0]
+            slug = _SLUG_RE.sub('-', title.lower()).strip('-')
             
-            # Insert blog post
+            # Insert blog post in one round-trip: the author's group comes from
+            # users, and a taken slug gets the timestamp suffix
             cursor.execute("""
                 INSERT INTO blog_posts 
                 (title, slug, content, excerpt, author_id, group_id, tags, is_published, published_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
+                SELECT %s,
+                       CASE WHEN EXISTS (SELECT 1 FROM blog_posts WHERE slug = %s)
+                            THEN %s ELSE %s END,
+                       %s, %s, u.id, u.group_id, %s, %s, %s
+                FROM users u
+                WHERE u.id = %s
+                RETURNING id, slug
             """, (
-                title, slug, content, excerpt, current_user_id, group_id,
-                tags, is_published, datetime.utcnow() if is_published else None
+                title, slug, f"{slug}-{int(datetime.now().timestamp())}", slug,
+                content, excerpt, tags, is_published,
+                datetime.utcnow() if is_published else None, current_user_id
             ))
             
-            post_id = cursor.fetchone()[0]
+            post_id, slug = cursor.fetchone()
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             # Log activity
             log_user_activity(current_user_id, 'api_create_blog_post', 'blog_post', post_id)
@@ -354,7 +419,7 @@ def get_user_profile(current_user_id):
             
             user = cursor.fetchone()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             if not user:
                 return jsonify({'message': 'User not found'}), 404
@@ -382,13 +447,13 @@ def update_user_profile(current_user_id):
             
             cursor.execute("""
                 UPDATE users 
-                SET first_name = %s, last_name = %s, bio = %s, updated_at = %s
+                SET first_name = %s, last_name = %s, bio = %s, updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
-            """, (first_name, last_name, bio, datetime.utcnow(), current_user_id))
+            """, (first_name, last_name, bio, current_user_id))
             
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             # Log activity
             log_user_activity(current_user_id, 'api_update_profile', 'user', current_user_id)
@@ -440,6 +505,11 @@ def generate_ai_content(current_user_id):
 def get_system_settings():
     """Get public system settings"""
     try:
+        # Settings only change through init_db/manual edits, so a short TTL is enough
+        settings_dict = cache_get('system_settings')
+        if settings_dict is not None:
+            return jsonify(settings_dict)
+
         conn = get_db_connection()
         if conn:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -448,10 +518,11 @@ def get_system_settings():
             settings = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             # Convert to dictionary
             settings_dict = {s['setting_key']: s['setting_value'] for s in settings}
+            cache_set('system_settings', settings_dict, SYSTEM_SETTINGS_CACHE_TIMEOUT)
             
             return jsonify(settings_dict)
         else:
@@ -12,7 +12,7 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from app import get_db_connection, login_required, role_required, allowed_file, log_user_activity
+from app import get_db_connection, release_db_connection, login_required, role_required, allowed_file, log_user_activity, record_view
 from ai_service import ai_service
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
@@ -46,7 +46,7 @@ def blog_index():
             blog_posts = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('blog/index.html', blog_posts=blog_posts)
         else:
@@ -80,9 +80,7 @@ def view_post(slug):
                 flash('Blog post not found', 'danger')
                 return redirect(url_for('blog.blog_index'))
 
-            # Increment view count
-            cursor.execute("UPDATE blog_posts SET view_count = view_count + 1 WHERE id = %s", (post['id'],))
-            conn.commit()
+            record_view('blog_posts', post['id'])
 
             # Get related posts (same group or same tags)
             cursor.execute("""
@@ -121,7 +119,7 @@ def view_post(slug):
             comment_count = len(all_comments)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             return render_template('blog/view.html', post=post, related_posts=related_posts,
                                    comments=comments, comment_count=comment_count)
@@ -229,13 +227,13 @@ def create_post():
                 if needs_moderation:
                     cursor.execute("""
                         INSERT INTO moderation_queue (content_type, content_id, status, created_at)
-                        VALUES (%s, %s, %s, %s)
-                    """, ('blog_post', post_id, 'pending', datetime.utcnow()))
+                        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                    """, ('blog_post', post_id, 'pending'))
                     logger.info(f"Blog post {post_id} added to moderation queue")
 
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
 
                 # Log activity
                 log_user_activity(session['user_id'], 'create_blog_post', 'blog_post', post_id)
@@ -349,18 +347,18 @@ def edit_post(post_id):
                     SET title = %s, slug = %s, content = %s, excerpt = %s,
                         featured_image_url = %s, tags = %s, meta_description = %s,
                         meta_keywords = %s, is_published = %s, published_at = %s,
-                        updated_at = %s
+                        updated_at = CURRENT_TIMESTAMP
                     WHERE id = %s
                 """, (
                     title, slug, content, excerpt, featured_image_url,
                     tags.split(',') if tags else [],
                     meta_description, meta_keywords, is_published, published_at,
-                    datetime.utcnow(), post_id
+                    post_id
                 ))
                 
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 
                 # Log activity
                 log_user_activity(session['user_id'], 'edit_blog_post', 'blog_post', post_id)
@@ -372,7 +370,7 @@ def edit_post(post_id):
                     return redirect(url_for('blog.my_posts'))
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('blog/edit.html', post=post)
         else:
@@ -414,7 +412,7 @@ def delete_post(post_id):
             cursor.execute("DELETE FROM blog_posts WHERE id = %s", (post_id,))
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             # Log activity
             log_user_activity(session['user_id'], 'delete_blog_post', 'blog_post', post_id)
@@ -471,7 +469,7 @@ def my_posts():
             
             blog_posts = cursor.fetchall()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('blog/my_posts.html', blog_posts=blog_posts)
         else:
@@ -728,7 +726,7 @@ def add_comment(post_id):
             if not post:
                 flash('Blog post not found', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('blog.blog_index'))
 
             # Validate parent_id if provided
@@ -755,7 +753,7 @@ def add_comment(post_id):
                               {'post_id': post_id, 'is_reply': bool(parent_id)})
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Comment added successfully!', 'success')
             return redirect(url_for('blog.view_post', slug=post['slug']) + f'#comment-{comment_id}')
@@ -795,28 +793,28 @@ def edit_comment(comment_id):
             if not comment:
                 flash('Comment not found', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('blog.blog_index'))
 
             # Check permission (owner or admin)
             if comment['user_id'] != session['user_id'] and session['user_role'] not in ['SuperAdmin', 'Admin']:
                 flash('You do not have permission to edit this comment', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('blog.view_post', slug=comment['slug']))
 
             # Update comment
             cursor.execute("""
-                UPDATE comments SET content = %s, updated_at = %s
+                UPDATE comments SET content = %s, updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
-            """, (content, datetime.utcnow(), comment_id))
+            """, (content, comment_id))
             conn.commit()
 
             # Log activity
             log_user_activity(session['user_id'], 'edit_comment', 'comment', comment_id)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Comment updated successfully!', 'success')
             return redirect(url_for('blog.view_post', slug=comment['slug']) + f'#comment-{comment_id}')
@@ -850,7 +848,7 @@ def delete_comment(comment_id):
             if not comment:
                 flash('Comment not found', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('blog.blog_index'))
 
             # Check permission (comment owner, post author, or admin)
@@ -863,21 +861,21 @@ def delete_comment(comment_id):
             if not can_delete:
                 flash('You do not have permission to delete this comment', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('blog.view_post', slug=comment['slug']))
 
             # Soft delete
             cursor.execute("""
-                UPDATE comments SET is_deleted = TRUE, updated_at = %s
+                UPDATE comments SET is_deleted = TRUE, updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
-            """, (datetime.utcnow(), comment_id))
+            """, (comment_id,))
             conn.commit()
 
             # Log activity
             log_user_activity(session['user_id'], 'delete_comment', 'comment', comment_id)
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             flash('Comment deleted successfully!', 'success')
             return redirect(url_for('blog.view_post', slug=comment['slug']))
@@ -988,7 +986,7 @@ def export_post_to_word(post_id):
         post = cursor.fetchone()
 
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
 
         if not post:
             flash('Blog post not found', 'danger')
@@ -10,7 +10,7 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from app import get_db_connection, login_required, log_user_activity
+from app import get_db_connection, release_db_connection, login_required, log_user_activity
 import logging
 
 logger = logging.getLogger(__name__)
@@ -98,7 +98,7 @@ def upload_media():
             media_id = cursor.fetchone()[0]
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             # Log activity
             log_user_activity(session['user_id'], 'upload_media', 'media_file', media_id, {
@@ -172,7 +172,7 @@ def list_media():
                 })
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             return jsonify({
                 'success': True,
@@ -218,7 +218,7 @@ def delete_media(media_id):
             cursor.execute("DELETE FROM media_files WHERE id = %s", (media_id,))
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             # Log activity
             log_user_activity(session['user_id'], 'delete_media', 'media_file', media_id, {
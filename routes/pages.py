@@ -11,7 +11,7 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from app import get_db_connection, login_required, role_required, allowed_file, log_user_activity
+from app import get_db_connection, release_db_connection, login_required, role_required, allowed_file, log_user_activity, record_view
 
 logger = logging.getLogger(__name__)
 
@@ -43,12 +43,10 @@ def view_page(slug):
             if not page:
                 flash('Page not found', 'danger')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 return redirect(url_for('index'))
 
-            # Increment view count
-            cursor.execute("UPDATE pages SET view_count = view_count + 1 WHERE id = %s", (page['id'],))
-            conn.commit()
+            record_view('pages', page['id'])
 
             # Process template if one is assigned
             rendered_content = page['content']
@@ -60,7 +58,7 @@ def view_page(slug):
                 rendered_content = template_html
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             return render_template('pages/view.html', page=page, rendered_content=rendered_content)
         else:
@@ -113,7 +111,7 @@ def create_page():
                 page_id = cursor.fetchone()[0]
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 
                 # Log activity
                 log_user_activity(session['user_id'], 'create_page', 'page', page_id)
@@ -141,7 +139,7 @@ def create_page():
             templates = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('pages/create.html', templates=templates)
         else:
@@ -195,18 +193,18 @@ def edit_page(page_id):
                     UPDATE pages 
                     SET title = %s, slug = %s, content = %s, template_id = %s,
                         meta_description = %s, meta_keywords = %s, is_published = %s,
-                        published_at = %s, updated_at = %s
+                        published_at = %s, updated_at = CURRENT_TIMESTAMP
                     WHERE id = %s
                 """, (
                     title, slug, content, template_id, meta_description, meta_keywords,
                     is_published,
                     datetime.utcnow() if is_published and not page['published_at'] else page['published_at'],
-                    datetime.utcnow(), page_id
+                    page_id
                 ))
                 
                 conn.commit()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 
                 # Log activity
                 log_user_activity(session['user_id'], 'edit_page', 'page', page_id)
@@ -223,7 +221,7 @@ def edit_page(page_id):
             templates = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('pages/edit.html', page=page, templates=templates)
         else:
@@ -262,7 +260,7 @@ def delete_page(page_id):
             cursor.execute("DELETE FROM pages WHERE id = %s", (page_id,))
             conn.commit()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             # Log activity
             log_user_activity(session['user_id'], 'delete_page', 'page', page_id)
@@ -319,7 +317,7 @@ def my_pages():
             
             pages = cursor.fetchall()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('pages/my_pages.html', pages=pages)
         else:
@@ -351,7 +349,7 @@ def contact_us():
             group = cursor.fetchone()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             if not group or not group['contact_page_content']:
                 # Use default contact page
@@ -388,7 +386,7 @@ def about_us():
             group = cursor.fetchone()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             if not group or not group['about_page_content']:
                 # Use default about page
@@ -438,7 +436,7 @@ def user_profile(username):
             blog_posts = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('pages/profile.html', user=user, blog_posts=blog_posts)
         else:
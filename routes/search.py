@@ -6,7 +6,7 @@ Handles site-wide search for blog posts and pages
 import logging
 from flask import Blueprint, render_template, request
 from psycopg2.extras import RealDictCursor
-from app import get_db_connection
+from app import get_db_connection, release_db_connection
 
 logger = logging.getLogger(__name__)
 
@@ -258,7 +258,7 @@ def search_results():
         total_pages = (total_results + per_page - 1) // per_page
 
         cursor.close()
-        conn.close()
+        release_db_connection(conn)
 
         return render_template('search_results.html',
                              results=results,
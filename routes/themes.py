@@ -7,10 +7,9 @@ import os
 import json
 import logging
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from app import get_db_connection, login_required, role_required, log_user_activity
+from app import get_db_connection, release_db_connection, login_required, role_required, log_user_activity, cache_delete
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +51,7 @@ def index():
             themes = cursor.fetchall()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('themes/index.html', themes=themes)
         else:
@@ -105,8 +104,9 @@ def create_theme():
                 
                 theme_id = cursor.fetchone()[0]
                 conn.commit()
+                cache_delete('admin:themes')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 
                 # Log activity
                 log_user_activity(session['user_id'], 'create_theme', 'theme', theme_id)
@@ -173,8 +173,9 @@ def ai_create_theme():
 
                     theme_id = cursor.fetchone()[0]
                     conn.commit()
+                    cache_delete('admin:themes')
                     cursor.close()
-                    conn.close()
+                    release_db_connection(conn)
 
                     # Log activity
                     log_user_activity(session['user_id'], 'ai_create_theme', 'theme', theme_id)
@@ -239,16 +240,17 @@ def edit_theme(theme_id):
                 cursor.execute("""
                     UPDATE themes 
                     SET name = %s, description = %s, css_variables = %s, 
-                        custom_css = %s, updated_at = %s
+                        custom_css = %s, updated_at = CURRENT_TIMESTAMP
                     WHERE id = %s
                 """, (
                     name, description, json.dumps(css_variables), custom_css,
-                    datetime.utcnow(), theme_id
+                    theme_id
                 ))
                 
                 conn.commit()
+                cache_delete('admin:themes')
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
                 
                 # Log activity
                 log_user_activity(session['user_id'], 'edit_theme', 'theme', theme_id)
@@ -257,7 +259,7 @@ def edit_theme(theme_id):
                 return redirect(url_for('themes.index'))
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('themes/edit.html', theme=theme)
         else:
@@ -292,7 +294,7 @@ def visual_editor(theme_id):
                 return redirect(url_for('themes.index'))
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             return render_template('themes/visual_editor.html', theme=theme)
         else:
@@ -330,12 +332,12 @@ def apply_theme(theme_id):
             # Apply theme to group
             group_id = theme['group_id'] if theme['group_id'] else session.get('group_id')
 
-            cursor.execute("UPDATE groups SET theme_id = %s, updated_at = %s WHERE id = %s",
-                          (theme_id, datetime.utcnow(), group_id))
+            cursor.execute("UPDATE groups SET theme_id = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                          (theme_id, group_id))
             conn.commit()
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             # Log activity
             log_user_activity(session['user_id'], 'apply_theme', 'theme', theme_id, {'group_id': group_id})
@@ -360,7 +362,7 @@ def preview_theme(theme_id):
             theme = cursor.fetchone()
             
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             
             if not theme:
                 flash('Theme not found', 'danger')
@@ -392,7 +394,7 @@ def visual_builder(theme_id=None):
                 cursor.execute("SELECT * FROM themes WHERE id = %s", (theme_id,))
                 theme = cursor.fetchone()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
 
                 if not theme:
                     flash('Theme not found', 'danger')
@@ -425,7 +427,7 @@ def advanced_builder(theme_id=None):
                 cursor.execute("SELECT * FROM themes WHERE id = %s", (theme_id,))
                 theme = cursor.fetchone()
                 cursor.close()
-                conn.close()
+                release_db_connection(conn)
 
                 if not theme:
                     flash('Theme not found', 'danger')
@@ -473,8 +475,9 @@ def visual_save():
 
             theme_id = cursor.fetchone()[0]
             conn.commit()
+            cache_delete('admin:themes')
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             log_user_activity(session['user_id'], 'create_visual_theme', 'theme', theme_id)
 
@@ -511,7 +514,7 @@ def update_theme(theme_id):
             cursor.execute("""
                 UPDATE themes
                 SET name = %s, description = %s, gjs_data = %s,
-                    gjs_assets = %s, html_export = %s, updated_at = %s
+                    gjs_assets = %s, html_export = %s, updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
             """, (
                 data['name'],
@@ -519,13 +522,13 @@ def update_theme(theme_id):
                 json.dumps(data['gjs_data']),
                 json.dumps(data.get('gjs_assets', [])),
                 data.get('html_export', ''),
-                datetime.utcnow(),
                 theme_id
             ))
 
             conn.commit()
+            cache_delete('admin:themes')
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             log_user_activity(session['user_id'], 'update_visual_theme', 'theme', theme_id)
 
@@ -547,7 +550,7 @@ def live_preview(theme_id):
             cursor.execute("SELECT * FROM themes WHERE id = %s", (theme_id,))
             theme = cursor.fetchone()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             if not theme:
                 return "Theme not found", 404
@@ -607,9 +610,10 @@ def delete_theme(theme_id):
             # Delete theme
             cursor.execute("DELETE FROM themes WHERE id = %s", (theme_id,))
             conn.commit()
+            cache_delete('admin:themes')
 
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
 
             # Log activity
             log_user_activity(session['user_id'], 'delete_theme', 'theme', theme_id)